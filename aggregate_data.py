@@ -0,0 +1,187 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module contains functions that compute statistics of the
+temperature data processed by 'process_data.py', grouped by any of
+province, year, month and station. Every statistic of every group is
+computed from a single sort of the data.
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+from typing import List, Dict, Tuple, Any, Optional, Sequence
+
+import numpy
+
+from process_data import TemperatureTable
+
+# The columns of a TemperatureTable that data can be grouped by
+GROUP_COLUMNS = ('prov', 'year', 'month', 'station')
+
+
+def aggregate(table: TemperatureTable, by: Sequence[str],
+              stats: Sequence[str] = ('median',), value: str = 'temp') -> Dict[str, numpy.ndarray]:
+    """Return the given statistics of the value column of table for each group of
+    records sharing the same values in the by columns.
+
+    The result maps each name in by to the key of every group, and each name in stats to
+    the statistic of every group, where the groups are sorted by their keys. The available
+    statistics are 'count', 'sum', 'mean', 'min', 'max', 'median', and 'p<q>' for the q-th
+    percentile (e.g. 'p90'), interpolated linearly like numpy.percentile. Records whose
+    value is missing are ignored.
+
+    Preconditions:
+        - all(name in GROUP_COLUMNS for name in by)
+        - value in {'temp', 'temp_max', 'temp_min'}
+
+    >>> table = TemperatureTable(prov=numpy.array(['YT', 'YT', 'NU']),
+    ...                          year=numpy.array([1991, 1991, 1991]),
+    ...                          month=numpy.array([8, 9, 8]),
+    ...                          temp=numpy.array([10.0, 6.0, 4.0]))
+    >>> result = aggregate(table, ['prov'], ['median', 'count'])
+    >>> result['prov'].tolist(), result['median'].tolist(), result['count'].tolist()
+    (['NU', 'YT'], [4.0, 8.0], [1, 2])
+    """
+    keys = {}
+    for name in by:
+        column = getattr(table, name)
+        if column is None:
+            raise ValueError(f'column {name!r} is not loaded in the table')
+        keys[name] = column
+
+    return aggregate_columns(keys, getattr(table, value), stats)
+
+
+def aggregate_columns(columns: Dict[str, numpy.ndarray], values: numpy.ndarray,
+                      stats: Sequence[str] = ('median',)) -> Dict[str, numpy.ndarray]:
+    """Return the given statistics of values for each group of values sharing the same
+    keys, in the same format as aggregate, where columns maps the name of each group
+    column to an array of keys of the same length as values.
+    """
+    by = list(columns)
+    keys = list(columns.values())
+    present = ~numpy.isnan(values)
+    values = values[present]
+    keys = [key[present] for key in keys]
+
+    # Sort by the group keys, then by value within each group
+    order = numpy.lexsort((values, *reversed(keys)))
+    values = values[order]
+    keys = [key[order] for key in keys]
+
+    starts = _group_starts(keys, len(values))
+    counts = numpy.diff(numpy.r_[starts, len(values)])
+    result = {name: key[starts] for name, key in zip(by, keys)}
+
+    for stat in stats:
+        result[stat] = _group_stat(stat, values, starts, counts)
+
+    return result
+
+
+def _group_starts(keys: List[numpy.ndarray], length: int) -> numpy.ndarray:
+    """Return the index at which each group starts in keys, which are sorted."""
+    if length == 0:
+        return numpy.zeros(0, dtype=numpy.intp)
+
+    change = numpy.zeros(length, dtype=bool)
+    change[0] = True
+    for key in keys:
+        change[1:] |= key[1:] != key[:-1]
+
+    return numpy.flatnonzero(change)
+
+
+def _group_stat(stat: str, values: numpy.ndarray, starts: numpy.ndarray,
+                counts: numpy.ndarray) -> numpy.ndarray:
+    """Return the statistic with the given name of each group of values, where values
+    are sorted within each group.
+    """
+    if len(starts) == 0:
+        return numpy.zeros(0)
+    if stat == 'count':
+        return counts
+    if stat == 'sum':
+        return numpy.add.reduceat(values, starts)
+    if stat == 'mean':
+        return numpy.add.reduceat(values, starts) / counts
+    if stat == 'min':
+        return values[starts]
+    if stat == 'max':
+        return values[starts + counts - 1]
+    if stat == 'median':
+        return (values[starts + (counts - 1) // 2] + values[starts + counts // 2]) / 2
+    if stat.startswith('p'):
+        position = (counts - 1) * float(stat[1:]) / 100
+        lower = numpy.floor(position).astype(numpy.intp)
+        upper = numpy.ceil(position).astype(numpy.intp)
+        low_values = values[starts + lower]
+        return low_values + (values[starts + upper] - low_values) * (position - lower)
+
+    raise ValueError(f'unknown statistic {stat!r}')
+
+
+def to_mapping(result: Dict[str, numpy.ndarray], by: Sequence[str], stat: str) -> Dict[Any, float]:
+    """Return the given statistic of an aggregate result as a mapping of group key to value.
+
+    If there is only one group column, the keys are its values; otherwise they are tuples.
+    """
+    values = result[stat].tolist()
+    if len(by) == 1:
+        return dict(zip(result[by[0]].tolist(), values))
+    return dict(zip(zip(*(result[name].tolist() for name in by)), values))
+
+
+def national_rollup(table: TemperatureTable, stat: str = 'median',
+                    weights: Optional[Dict[str, float]] = None,
+                    require_all: bool = True) -> Dict[int, float]:
+    """Return the weighted mean, over the provinces of table, of the yearly statistic
+    of each province.
+
+    weights maps each province to its weight, and every province has the same weight if
+    it is None. If require_all is True, only the years in which every province of table
+    has data are included.
+
+    Preconditions:
+        - weights is None or all(p in weights for p in table.prov)
+    """
+    result = aggregate(table, ['year', 'prov'], [stat])
+    provinces = numpy.unique(table.prov)
+    if weights is None:
+        weight = numpy.ones(len(result['prov']))
+    else:
+        lookup = numpy.array([weights[p] for p in provinces], dtype=numpy.float64)
+        weight = lookup[numpy.searchsorted(provinces, result['prov'])]
+
+    years = result['year']
+    starts = _group_starts([years], len(years))
+    counts = numpy.diff(numpy.r_[starts, len(years)])
+    if len(starts) == 0:
+        return {}
+
+    rollup = numpy.add.reduceat(weight * result[stat], starts) / \
+        numpy.add.reduceat(weight, starts)
+    keep = counts == len(provinces) if require_all else numpy.ones(len(starts), dtype=bool)
+
+    return dict(zip(years[starts][keep].tolist(), rollup[keep].tolist()))
+
+
+def province_year_stats(tables: Sequence[TemperatureTable], stats: Sequence[str] = ('median',)) \
+        -> Dict[Tuple[str, int], Dict[str, float]]:
+    """Return the given statistics of every (province, year) pair of the given tables,
+    computed in one pass over all of them.
+    """
+    result = aggregate(TemperatureTable.concatenate(tables), ['prov', 'year'], stats)
+    keys = zip(result['prov'].tolist(), result['year'].tolist())
+    columns = [result[stat].tolist() for stat in stats]
+    return {key: dict(zip(stats, row)) for key, row in zip(keys, zip(*columns))}
+
+
+if __name__ == '__main__':
+    import python_ta.contracts
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
@@ -0,0 +1,282 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module benchmarks the hot paths of the project: reading
+temperature files, computing medians, fitting the models, predicting the
+values of the simulation game and drawing its screen. The results are
+written as JSON and can be compared with a stored baseline. Run this file
+with --help for its options.
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from typing import List, Dict, Any, Callable, Optional
+
+import numpy
+
+import process_data
+from process_data import read_temperature_table, scan_temperature_table, process_row_temp, \
+    get_yearly_median_temp, read_csv_emission, read_csv_deforestation, \
+    read_csv_deforestation_hydro, fit_model
+from simulation import simulate
+from synthetic_data import write_synthetic_province
+
+# The groups of benchmarks that can be run
+CASES = ('ingest', 'median', 'fit', 'game', 'render')
+
+# The default number of rows of the synthetic temperature files
+SIZES = (10000, 100000)
+
+# The default relative slowdown of the median time above which a benchmark regressed
+TOLERANCE = 0.1
+
+# The directory containing this module
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure(name: str, func: Callable[[], Any], items: int, repeat: int) -> Dict[str, Any]:
+    """Return the timing of calling func repeat times, which processes the given number
+    of items each time, and the peak memory allocated by one extra call.
+    """
+    func()  # warm up
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = numpy.array(times)
+    return {
+        'name': name,
+        'items': items,
+        'repeat': repeat,
+        'min_s': float(seconds.min()),
+        'p50_s': float(numpy.percentile(seconds, 50)),
+        'p90_s': float(numpy.percentile(seconds, 90)),
+        'max_s': float(seconds.max()),
+        'items_per_s': items / float(numpy.percentile(seconds, 50)),
+        'peak_bytes': peak
+    }
+
+
+def synthetic_file(data_dir: str, n_rows: int) -> str:
+    """Return the path of a synthetic temperature file of n_rows rows in data_dir,
+    generating it if it does not exist yet.
+    """
+    path = os.path.join(data_dir, f'synthetic_{n_rows}.csv')
+    if not os.path.exists(path):
+        write_synthetic_province(path, n_rows)
+    return path
+
+
+def bench_ingest(data_dir: str, sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    """Benchmark reading synthetic temperature files of the given sizes."""
+    results = []
+    for size in sizes:
+        path = synthetic_file(data_dir, size)
+
+        def read_table() -> Any:
+            return read_temperature_table(path).filter(months={8, 9}).drop_missing()
+
+        def read_rows() -> Any:
+            with open(path, encoding='utf-8') as file:
+                reader = csv.reader(file)
+                next(reader)
+                data = [process_row_temp(row) for row in reader]
+            return [item for item in data if item.temp != -9999.9 and item.month in {8, 9}]
+
+        def scan() -> Any:
+            return scan_temperature_table(path, months={8, 9})
+
+        results.append(measure(f'ingest/read_csv_temp/{size}', read_table, size, repeat))
+        results.append(measure(f'ingest/process_row_temp/{size}', read_rows, size, repeat))
+        results.append(measure(f'ingest/scan/{size}', scan, size, repeat))
+    return results
+
+
+def bench_median(data_dir: str, sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    """Benchmark computing the yearly medians of synthetic temperature files."""
+    results = []
+    for size in sizes:
+        table = read_temperature_table(synthetic_file(data_dir, size)).drop_missing()
+        records = table.to_records()
+        results.append(measure(f'median/table/{size}',
+                               lambda: get_yearly_median_temp(table), len(table), repeat))
+        results.append(measure(f'median/records/{size}',
+                               lambda: get_yearly_median_temp(records), len(table), repeat))
+    return results
+
+
+def bench_fit(repeat: int) -> List[Dict[str, Any]]:
+    """Benchmark fitting the three models to the real emission and deforestation data,
+    without reusing earlier fits.
+    """
+    other_dir = os.path.join(_PROJECT_DIR, 'other_data')
+    emission = read_csv_emission(os.path.join(other_dir, 'emission.csv'))
+    deforestation = read_csv_deforestation(os.path.join(other_dir, 'deforestation.csv'))
+    hydro = read_csv_deforestation_hydro(os.path.join(other_dir, 'deforestation.csv'))
+    rest = {k: deforestation[k] - hydro[k] for k in deforestation}
+
+    rng = numpy.random.default_rng(0)
+    years = sorted(set(emission) & set(deforestation))
+    x = numpy.array([[emission[k] for k in years], [deforestation[k] for k in years]])
+    y = rng.normal(0, 0.5, len(years))
+
+    def fit(model: str, x_data: Any, y_data: Any) -> Callable[[], Any]:
+        def run() -> Any:
+            process_data._FITS.clear()
+            process_data._LATEST_PARAMS.clear()
+            return fit_model(model, x_data, y_data, cache_dir=None)
+        return run
+
+    return [
+        measure('fit/emission', fit('log', list(emission), list(emission.values())),
+                len(emission), repeat),
+        measure('fit/deforestation', fit('reciprocal', list(rest), list(rest.values())),
+                len(rest), repeat),
+        measure('fit/correlation', fit('linear', x, y), len(years), repeat)
+    ]
+
+
+def bench_game(repeat: int) -> List[Dict[str, Any]]:
+    """Benchmark predicting the values of the simulation game one year at a time and in
+    batches.
+    """
+    from game import TemperatureGame
+    curves = ((43.0, 1989.1, 589.5), (430040.0, 1976.5, 24492.0),
+              (7.5e-05, 602.9, 1.3e-12, 110164.5, -0.0325))
+    years = 1000
+
+    def steps() -> None:
+        game = TemperatureGame(*curves, 14)
+        for _ in range(years):
+            game.step()
+
+    return [
+        measure('game/step', steps, years, repeat),
+        measure('game/replay', lambda: TemperatureGame.replay(*curves, 14, 0, years),
+                years, repeat),
+        measure('game/simulate', lambda: simulate(*curves, 14, 1000, 100, seed=0),
+                1000 * 100, repeat)
+    ]
+
+
+def bench_render(repeat: int) -> List[Dict[str, Any]]:
+    """Benchmark drawing the screen of the simulation game without a display."""
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    import pygame
+    from game import TemperatureGame, GameRenderer, SCREEN_SIZE, release_fonts
+
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    game = TemperatureGame((43.0, 1989.1, 589.5), (430040.0, 1976.5, 24492.0),
+                           (7.5e-05, 602.9, 1.3e-12, 110164.5, -0.0325), 14)
+    renderer = GameRenderer(screen)
+    renderer.draw_all()
+    frames = 100
+
+    def predict_display() -> None:
+        for i in range(frames):
+            screen.blit(renderer.background, (0, 0))
+            game.predict_display(screen, 2020 + i, 700.0 + i, 30000.0 + i, 14.0 + i)
+
+    def draw_values() -> None:
+        for i in range(frames):
+            pygame.display.update(renderer.draw_values(2020 + i, 700.0 + i, 30000.0 + i,
+                                                       14.0 + i, i % 20 == 0))
+
+    results = [measure('render/predict_display', predict_display, frames, repeat),
+               measure('render/draw_values', draw_values, frames, repeat)]
+    release_fonts()
+    pygame.quit()
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+            tolerance: float) -> List[Dict[str, Any]]:
+    """Return the comparison of the median time of each result with the baseline result
+    of the same name, flagging the ones more than tolerance slower.
+    """
+    previous = {result['name']: result for result in baseline}
+    comparisons = []
+    for result in results:
+        if result['name'] in previous:
+            ratio = result['p50_s'] / previous[result['name']]['p50_s']
+            comparisons.append({'name': result['name'], 'ratio': ratio,
+                                'regressed': ratio > 1 + tolerance})
+    return comparisons
+
+
+def run(cases: List[str], sizes: List[int], repeat: int,
+        data_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Run the given groups of benchmarks and return their results."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = data_dir or temp_dir
+        os.makedirs(data_dir, exist_ok=True)
+        results = []
+        if 'ingest' in cases:
+            results.extend(bench_ingest(data_dir, sizes, repeat))
+        if 'median' in cases:
+            results.extend(bench_median(data_dir, sizes, repeat))
+        if 'fit' in cases:
+            results.extend(bench_fit(repeat))
+        if 'game' in cases:
+            results.extend(bench_game(repeat))
+        if 'render' in cases:
+            results.extend(bench_render(repeat))
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmarks given by argv, and return 1 if any of them regressed
+    compared with the baseline, or 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the hot paths of the project.')
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=list(CASES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(SIZES),
+                        help='numbers of rows of the synthetic temperature files')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--data-dir', help='keep the synthetic files in this directory')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare the results with this JSON file')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    report = {'python': sys.version.split()[0], 'numpy': numpy.__version__,
+              'results': run(args.cases, args.sizes, args.repeat, args.data_dir)}
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+        report['comparison'] = compare(report['results'], baseline, args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text)
+    else:
+        print(text)
+
+    return int(any(c['regressed'] for c in report.get('comparison', [])))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,488 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module contains the ClimateDataset class, which finds the
+raw data files used by the project and processes them with the functions
+in 'process_data.py' only when a piece of processed data is first needed.
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+import os
+
+from dataclasses import dataclass
+from functools import cached_property
+from typing import List, Dict, Tuple, Callable, Collection, Optional, Sequence, Set
+
+from aggregate_data import national_rollup
+from instrument import stage
+from seasons import seasonal_stats
+from stations import StationCatalogue, STATION_COLUMNS, regional_stat
+from process_data import TemperatureTable, ANALYSIS_MONTHS, CACHE_DIR, load_temperature_table, \
+    read_appended_temperature, file_digest, load_provinces, get_yearly_median_temp, \
+    read_csv_emission, model_emission, read_csv_deforestation, read_csv_deforestation_hydro, \
+    model_deforestation, model_correlation
+
+# The name of the temperature file of each province
+PROVINCE_FILES = {
+    'AB': 'alberta.csv',
+    'BC': 'british_columbia.csv',
+    'MB': 'manitoba.csv',
+    'NB': 'new_brunswick.csv',
+    'NL': 'newfoundland.csv',
+    'NT': 'northwest.csv',
+    'NS': 'nova_scotia.csv',
+    'NU': 'nunavut.csv',
+    'ON': 'ontario.csv',
+    'PE': 'prince_edward.csv',
+    'QC': 'quebec.csv',
+    'SK': 'saskatchewan.csv',
+    'YT': 'yukon.csv'
+}
+
+# The directory containing this module, which the default data directories are relative to
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@dataclass
+class SourceState:
+    """The state of a source file at the moment it was read.
+
+    Instance Attributes:
+        - path: the path of the file
+        - size: the size of the file in bytes, which is the number of bytes read from it
+        - mtime_ns: the modification time of the file in nanoseconds
+        - sha256: the SHA-256 hex digest of the first size bytes of the file
+    """
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+# The sources each derived value of a ClimateDataset comes from, where 'temperature'
+# stands for the temperature file of every province used by canada_median
+DEPENDENCIES = {
+    'canada_median': ('temperature',),
+    'emission_data': ('emission.csv',),
+    'emission_curve': ('emission.csv',),
+    'deforestation_data': ('deforestation.csv',),
+    'deforestation_hydro': ('deforestation.csv',),
+    'deforestation_rest': ('deforestation.csv',),
+    'deforestation_rest_curve': ('deforestation.csv',),
+    'temp_change': ('temperature',),
+    'final_data': ('temperature', 'emission.csv', 'deforestation.csv'),
+    'final_correlation': ('temperature', 'emission.csv', 'deforestation.csv')
+}
+
+
+class ClimateDataset:
+    """The processed climate data of the project, loaded on first access.
+
+    Each piece of data is computed the first time it is accessed and then kept,
+    so only the files that are actually needed are ever read. Provinces whose
+    temperature file does not exist are left out of the national data. The
+    years of each series are the years covered by its data.
+
+    After source files change, refresh() brings the data up to date, reading only
+    the rows appended to temperature files and recomputing only the years they affect.
+
+    Instance Attributes:
+        - temp_dir: the directory containing the temperature file of each province
+        - other_dir: the directory containing the emission and deforestation files
+        - cache_dir: the directory in which parsed temperature files are cached,
+          or None to disable the cache
+
+    Sample usage:
+    >>> data = ClimateDataset()
+    >>> 'YT' in data.available_provinces()
+    True
+    >>> data.province_median('YT')[1991] < 20
+    True
+    """
+    temp_dir: str
+    other_dir: str
+    cache_dir: Optional[str]
+    _tables: Dict[str, TemperatureTable]
+    _temps: Dict[str, TemperatureTable]
+    _station_temps: Dict[str, TemperatureTable]
+    _medians: Dict[str, Dict[int, float]]
+    _sources: Dict[str, SourceState]
+    _canada_provinces: List[str]
+
+    def __init__(self, temp_dir: str = os.path.join(_PROJECT_DIR, 'temperature'),
+                 other_dir: str = os.path.join(_PROJECT_DIR, 'other_data'),
+                 cache_dir: Optional[str] = CACHE_DIR) -> None:
+        """Initialize the dataset without reading any file."""
+        self.temp_dir = temp_dir
+        self.other_dir = other_dir
+        self.cache_dir = cache_dir
+        self._tables = {}
+        self._temps = {}
+        self._station_temps = {}
+        self._medians = {}
+        self._sources = {}
+        self._canada_provinces = []
+
+    def province_file(self, prov: str) -> str:
+        """Return the path of the temperature file of the given province."""
+        return os.path.join(self.temp_dir, PROVINCE_FILES[prov])
+
+    def other_file(self, name: str) -> str:
+        """Return the path of the emission or deforestation file with the given name."""
+        return os.path.join(self.other_dir, name)
+
+    def available_provinces(self) -> List[str]:
+        """Return the provinces whose temperature file exists."""
+        return [prov for prov in PROVINCE_FILES if os.path.exists(self.province_file(prov))]
+
+    def missing_provinces(self) -> List[str]:
+        """Return the provinces whose temperature file does not exist."""
+        return [prov for prov in PROVINCE_FILES if not os.path.exists(self.province_file(prov))]
+
+    def province_table(self, prov: str) -> TemperatureTable:
+        """Return the temperature data of every month of the given province.
+
+        Raise FileNotFoundError if the temperature file of the province does not exist.
+        """
+        if prov not in self._tables:
+            path = self.province_file(prov)
+            state = _source_state(path)
+            self._set_table(prov, load_temperature_table(path, self.cache_dir,
+                                                         length=state.size))
+            self._sources[path] = state
+        return self._tables[prov]
+
+    def province_temp(self, prov: str) -> TemperatureTable:
+        """Return the temperature data of the given province in ANALYSIS_MONTHS.
+
+        Raise FileNotFoundError if the temperature file of the province does not exist.
+        """
+        if prov not in self._temps:
+            self.province_table(prov)
+        return self._temps[prov]
+
+    def _set_table(self, prov: str, table: TemperatureTable) -> None:
+        """Store table as the temperature data of the given province."""
+        self._tables[prov] = table.drop_missing()
+        self._temps[prov] = self._tables[prov].filter(months=ANALYSIS_MONTHS)
+        self._station_temps.pop(prov, None)
+
+    def province_columns(self, prov: str, columns: Collection[str]) -> TemperatureTable:
+        """Return the temperature data of every month of the given province like
+        province_table, with the given optional columns as well.
+
+        The optional columns are decoded from the same bytes of the temperature file as
+        province_table, so both describe the file in the state given by provenance.
+
+        Raise FileNotFoundError if the temperature file of the province does not exist.
+
+        Preconditions:
+            - all(name in OPTIONAL_COLUMNS for name in columns)
+        """
+        table = self.province_table(prov)
+        if all(getattr(table, name) is not None for name in columns):
+            return table
+        path = self.province_file(prov)
+        return load_temperature_table(path, self.cache_dir, columns,
+                                      self._sources[path].size).drop_missing()
+
+    def _station_temp(self, prov: str) -> TemperatureTable:
+        """Return the temperature data of the given province in ANALYSIS_MONTHS along with
+        the STATION_COLUMNS, which are only decoded once they are needed.
+        """
+        if prov not in self._station_temps:
+            self._station_temps[prov] = self.province_columns(prov, STATION_COLUMNS) \
+                .filter(months=ANALYSIS_MONTHS)
+        return self._station_temps[prov]
+
+    def preload(self, workers: Optional[int] = None) -> Dict[str, float]:
+        """Load the temperature data of every available province that is not loaded yet,
+        using a pool of worker processes, and return the seconds spent on each file.
+        """
+        provinces = [prov for prov in self.available_provinces() if prov not in self._tables]
+        paths = [self.province_file(prov) for prov in provinces]
+        states = [_source_state(path) for path in paths]
+        tables, timings = load_provinces(paths, workers, self.cache_dir,
+                                         lengths=[state.size for state in states])
+
+        for prov, path, state in zip(provinces, paths, states):
+            self._set_table(prov, tables[path])
+            self._sources[path] = state
+
+        return timings
+
+    def province_median(self, prov: str) -> Dict[int, float]:
+        """Return the yearly median temperature of the given province.
+
+        Raise FileNotFoundError if the temperature file of the province does not exist.
+        """
+        if prov not in self._medians:
+            self._medians[prov] = get_yearly_median_temp(self.province_temp(prov))
+        return self._medians[prov]
+
+    def seasonal_median(self, windows: Dict[str, Sequence[int]],
+                        provinces: Optional[Collection[str]] = None,
+                        complete: bool = True) -> Dict[str, Dict[Tuple[str, int], float]]:
+        """Return the yearly median temperature of each of the given provinces, or of every
+        available province if provinces is None, over every window of months of windows.
+
+        windows maps the name of each window to its months, e.g. SEASONS. The result maps
+        the name of each window to a mapping of (province, year) to median. If complete is
+        True, a year of a province is left out of a window unless it has data for every
+        month of the window, as in seasonal_stats. Each temperature file is read at most
+        once, whatever the windows.
+        """
+        if provinces is None:
+            provinces = self.available_provinces()
+        tables = [self.province_table(prov) for prov in provinces]
+        if tables == []:
+            return {name: {} for name in windows}
+        with stage('seasonal_median', provinces=len(tables), windows=len(windows)):
+            return seasonal_stats(TemperatureTable.concatenate(tables), windows,
+                                  ('prov', 'year'), complete=complete)
+
+    @cached_property
+    def canada_median(self) -> Dict[int, float]:
+        """The yearly median temperature of Canada, which is the mean of the medians of
+        every available province, for the years covered by every one of them.
+        """
+        self._canada_provinces = self.available_provinces()
+        tables = [self.province_temp(prov) for prov in self._canada_provinces]
+        with stage('canada_median', provinces=len(tables)):
+            return national_rollup(TemperatureTable.concatenate(tables), 'median')
+
+    @cached_property
+    def stations(self) -> StationCatalogue:
+        """The catalogue of the stations that recorded the temperature data of every
+        available province.
+        """
+        tables = [self._station_temp(prov) for prov in self.available_provinces()]
+        with stage('stations', provinces=len(tables)):
+            return StationCatalogue.from_tables(tables)
+
+    def regional_median(self, stations: Collection[str]) -> Dict[int, float]:
+        """Return the yearly median temperature recorded by the given stations, such as
+        the stations returned by a query of the stations catalogue.
+
+        Only the temperature data of the provinces of the given stations is loaded.
+        Raise KeyError if a station is not in the stations catalogue.
+        """
+        catalogue = self.stations
+        provinces = sorted(set(catalogue.prov[catalogue.index_of(stations)].tolist()))
+        tables = [self._station_temp(prov) for prov in provinces]
+        if tables == []:
+            return {}
+        return regional_stat(TemperatureTable.concatenate(tables), stations)
+
+    @cached_property
+    def emission_data(self) -> Dict[int, int]:
+        """The yearly greenhouse gas emission of Canada."""
+        return self._read_other('emission.csv', read_csv_emission)
+
+    @cached_property
+    def emission_curve(self) -> Tuple[float, float, float]:
+        """The best-fit curve of emission_data."""
+        return model_emission(self.emission_data, self.cache_dir, 'emission_curve')
+
+    @cached_property
+    def deforestation_data(self) -> Dict[int, int]:
+        """The yearly deforestation of Canada."""
+        return self._read_other('deforestation.csv', read_csv_deforestation)
+
+    @cached_property
+    def deforestation_hydro(self) -> Dict[int, int]:
+        """The yearly deforestation of Canada caused by hydroelectric development."""
+        return self._read_other('deforestation.csv', read_csv_deforestation_hydro)
+
+    @cached_property
+    def deforestation_rest(self) -> Dict[int, int]:
+        """The yearly deforestation of Canada not caused by hydroelectric development."""
+        return {k: self.deforestation_data[k] - self.deforestation_hydro[k]
+                for k in self.deforestation_data if k in self.deforestation_hydro}
+
+    @cached_property
+    def deforestation_rest_curve(self) -> Tuple[float, float, float]:
+        """The best-fit curve of deforestation_rest."""
+        return model_deforestation(self.deforestation_rest, self.cache_dir,
+                                   'deforestation_rest_curve')
+
+    @cached_property
+    def temp_change(self) -> Dict[int, float]:
+        """The change of canada_median from each year to the next."""
+        return {k: self.canada_median[k + 1] - self.canada_median[k]
+                for k in sorted(self.canada_median) if k + 1 in self.canada_median}
+
+    @cached_property
+    def final_data(self) -> Tuple[List[float], List[int], List[int]]:
+        """The temperature change, emission and deforestation of the years covered by
+        all three, in the format taken by model_correlation.
+        """
+        temp_change, emission, deforestation = \
+            self.temp_change, self.emission_data, self.deforestation_data
+        with stage('final_data') as info:
+            years = sorted(set(temp_change) & set(emission) & set(deforestation))
+            info['rows'] = len(years)
+            return (
+                [temp_change[k] for k in years],
+                [emission[k] for k in years],
+                [deforestation[k] for k in years]
+            )
+
+    @cached_property
+    def final_correlation(self) -> Tuple[float, float, float, float, float]:
+        """The correlation between temperature change and (emission and deforestation)."""
+        return model_correlation(self.final_data, self.cache_dir, 'final_correlation')
+
+    def provenance(self, name: str) -> Dict[str, str]:
+        """Return the path and SHA-256 digest of every source file read to compute the
+        derived value with the given name, e.g. 'canada_median' or 'emission_curve'.
+        A province code gives the sources of its temperature data and median.
+
+        Preconditions:
+            - name in DEPENDENCIES or name in PROVINCE_FILES
+        """
+        if name in PROVINCE_FILES:
+            paths = [self.province_file(name)]
+        else:
+            paths = []
+            for source in DEPENDENCIES[name]:
+                if source == 'temperature':
+                    paths.extend(self.province_file(prov) for prov in self._canada_provinces)
+                else:
+                    paths.append(self.other_file(source))
+
+        return {path: self._sources[path].sha256 for path in paths if path in self._sources}
+
+    def refresh(self) -> Set[str]:
+        """Update the loaded data with the changes made to their source files since they
+        were read, and return the names of the derived values that changed.
+
+        Rows appended to a temperature file are read on their own, and only the medians
+        of the years they belong to are recomputed. Any other change to a file causes it
+        to be read again in full, and a province whose file was deleted is dropped.
+        """
+        changed = set()
+        years = set()
+
+        for prov in list(self._tables):
+            try:
+                prov_years = self._refresh_province(prov)
+            except FileNotFoundError:
+                self._drop_province(prov)
+                changed.add(prov)
+                continue
+            if prov_years:
+                changed.add(prov)
+                years.update(prov_years)
+
+        invalid = set()
+        if changed and 'stations' in self.__dict__:
+            invalid.add('stations')
+        if 'canada_median' in self.__dict__:
+            if self._canada_provinces != self.available_provinces():
+                invalid.add('canada_median')
+            elif years:
+                self._update_canada_median(years)
+                changed.add('canada_median')
+
+        for name in ('emission.csv', 'deforestation.csv'):
+            path = self.other_file(name)
+            if path in self._sources and _has_changed(self._sources[path]):
+                del self._sources[path]
+                invalid.update(k for k in DEPENDENCIES if DEPENDENCIES[k] == (name,))
+
+        if (changed | invalid) & {'canada_median', 'emission_data', 'deforestation_data'}:
+            invalid.update(('temp_change', 'final_data', 'final_correlation'))
+
+        for name in invalid:
+            self.__dict__.pop(name, None)
+
+        return changed | invalid
+
+    def _refresh_province(self, prov: str) -> Set[int]:
+        """Update the temperature data and medians of the given province with the changes
+        made to its file, and return the years whose data changed.
+        """
+        path = self.province_file(prov)
+        old = self._sources[path]
+        if not _has_changed(old):
+            return set()
+
+        state = _source_state(path)
+        table = self._temps[prov]
+        if state.size > old.size and file_digest(path, old.size) == old.sha256:
+            appended = read_appended_temperature(path, old.size, length=state.size)
+            years = set(appended.filter(months=ANALYSIS_MONTHS).drop_missing().year.tolist())
+            self._set_table(prov, TemperatureTable.concatenate([self._tables[prov], appended]))
+        else:
+            self._set_table(prov, load_temperature_table(path, self.cache_dir,
+                                                         length=state.size))
+            years = set(table.year.tolist()) | set(self._temps[prov].year.tolist())
+        self._sources[path] = state
+
+        if prov in self._medians:
+            medians = get_yearly_median_temp(self._temps[prov].filter(years=years))
+            for year in years:
+                if year in medians:
+                    self._medians[prov][year] = medians[year]
+                else:
+                    self._medians[prov].pop(year, None)
+
+        return years
+
+    def _drop_province(self, prov: str) -> None:
+        """Forget the temperature data and medians of the given province."""
+        for data in (self._tables, self._temps, self._station_temps, self._medians):
+            data.pop(prov, None)
+        self._sources.pop(self.province_file(prov), None)
+
+    def _update_canada_median(self, years: Set[int]) -> None:
+        """Recompute canada_median for the given years from the medians of each province."""
+        medians = [self.province_median(prov) for prov in self._canada_provinces]
+        canada_median = self.__dict__['canada_median']
+        for year in years:
+            if all(year in median for median in medians):
+                canada_median[year] = sum(median[year] for median in medians) / len(medians)
+            else:
+                canada_median.pop(year, None)
+        self.__dict__['canada_median'] = dict(sorted(canada_median.items()))
+
+    def _read_other(self, name: str, reader: Callable[[str], Dict[int, int]]) -> Dict[int, int]:
+        """Return the data read by reader from the other data file with the given name,
+        and record the state of the file.
+        """
+        path = self.other_file(name)
+        state = _source_state(path)
+        data = reader(path)
+        self._sources.setdefault(path, state)
+        return data
+
+
+def _source_state(path: str) -> SourceState:
+    """Return the current state of the file at path.
+
+    Only the first state.size bytes of the file must then be read from it, so that rows
+    appended in the meantime are read by the next refresh rather than twice.
+    """
+    stat = os.stat(path)
+    return SourceState(path, stat.st_size, stat.st_mtime_ns, file_digest(path, stat.st_size))
+
+
+def _has_changed(state: SourceState) -> bool:
+    """Return whether the file described by state has changed since state was recorded."""
+    try:
+        stat = os.stat(state.path)
+    except OSError:
+        return True
+    return stat.st_size != state.size or stat.st_mtime_ns != state.mtime_ns
+
+
+if __name__ == '__main__':
+    import python_ta.contracts
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
@@ -0,0 +1,240 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module writes the data processed by 'dataset.py' to an export
+directory of columnar binary files that other programs can read without
+parsing any csv file, and reads such directories back. Run this file with
+one of the following commands:
+
+    python export_data.py export OUTPUT_DIR
+    python export_data.py inspect EXPORT_DIR
+
+An export directory contains one subdirectory per exported table, holding
+one .npy file per column, and a 'metadata.json' file describing every
+table along with the source files, fitted curves and years it comes from.
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+
+import numpy
+
+from dataset import ClimateDataset
+from instrument import stage
+from process_data import TemperatureTable, OPTIONAL_COLUMNS
+
+# The version of the layout of export directories
+EXPORT_VERSION = 1
+
+# The name of the metadata file of an export directory
+METADATA_FILE = 'metadata.json'
+
+# The derived yearly series of a ClimateDataset that are exported, with their value type
+SERIES = {
+    'canada_median': numpy.float64,
+    'temp_change': numpy.float64,
+    'emission_data': numpy.int64,
+    'deforestation_data': numpy.int64,
+    'deforestation_rest': numpy.int64
+}
+
+# The fitted curves of a ClimateDataset that are exported
+CURVES = ('emission_curve', 'deforestation_rest_curve', 'final_correlation')
+
+
+@dataclass
+class ExportedData:
+    """The tables of an export directory, memory-mapped from their files.
+
+    Instance Attributes:
+        - path: the export directory
+        - metadata: the content of the metadata file of the export directory
+
+    Sample usage:
+    >>> exported = read_export('export')  # doctest: +SKIP
+    >>> exported.series('canada_median')[1991]  # doctest: +SKIP
+    11.675
+    """
+    path: str
+    metadata: Dict[str, Any]
+
+    def tables(self) -> List[str]:
+        """Return the names of the tables in the export directory."""
+        return sorted(self.metadata['tables'])
+
+    def table(self, name: str) -> Dict[str, numpy.ndarray]:
+        """Return the columns of the table with the given name, memory-mapped so that
+        only the parts that are used are ever read from disk.
+
+        Raise KeyError if there is no table with the given name.
+        """
+        columns = self.metadata['tables'][name]['columns']
+        return {column: numpy.load(os.path.join(self.path, name, f'{column}.npy'),
+                                   mmap_mode='r', allow_pickle=False)
+                for column in columns}
+
+    def series(self, name: str) -> Dict[int, float]:
+        """Return the yearly series with the given name as a mapping of year to value."""
+        table = self.table(name)
+        return dict(zip(table['year'].tolist(), table['value'].tolist()))
+
+    def province_median(self, prov: str) -> Dict[int, float]:
+        """Return the yearly median temperature of the given province."""
+        table = self.table('province_median')
+        mask = table['prov'] == prov
+        return dict(zip(table['year'][mask].tolist(), table['value'][mask].tolist()))
+
+    def temperature(self) -> TemperatureTable:
+        """Return the exported per-row temperature data as a TemperatureTable whose
+        columns are memory-mapped.
+        """
+        return TemperatureTable(**self.table('temperature'))
+
+
+def export_dataset(data: ClimateDataset, output: str) -> Dict[str, Any]:
+    """Write the derived series, fitted curves and province medians of data, along with
+    its per-row temperature data, to the export directory output, and return the
+    metadata written.
+
+    data is refreshed first, and every exported table is computed from the same bytes of
+    the source files as the digests recorded in the metadata. The per-row temperature
+    data only has the records whose mean temperature is not missing, like
+    ClimateDataset.province_table.
+
+    An existing export directory at output is replaced only once the new one is
+    completely written, and nothing is left behind if the export fails.
+    """
+    temp_path = output.rstrip(os.sep) + '.tmp'
+    if os.path.exists(temp_path):
+        shutil.rmtree(temp_path)
+    os.makedirs(temp_path)
+
+    try:
+        with stage('export', output=output) as info:
+            data.refresh()
+            provinces = data.available_provinces()
+            tables = {}
+            for name, value_type in SERIES.items():
+                series = getattr(data, name)
+                years = sorted(series)
+                tables[name] = {
+                    'year': numpy.array(years, dtype=numpy.int32),
+                    'value': numpy.array([series[k] for k in years], dtype=value_type)
+                }
+
+            medians = [(prov, year, value) for prov in provinces
+                       for year, value in sorted(data.province_median(prov).items())]
+            tables['province_median'] = {
+                'prov': numpy.array([m[0] for m in medians], dtype='<U2'),
+                'year': numpy.array([m[1] for m in medians], dtype=numpy.int32),
+                'value': numpy.array([m[2] for m in medians], dtype=numpy.float64)
+            }
+
+            temperature = TemperatureTable.concatenate([
+                data.province_columns(prov, OPTIONAL_COLUMNS) for prov in provinces])
+            tables['temperature'] = temperature.columns()
+
+            metadata = {
+                'version': EXPORT_VERSION,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'tables': {name: _write_table(os.path.join(temp_path, name), columns)
+                           for name, columns in tables.items()},
+                'curves': {name: list(getattr(data, name)) for name in CURVES},
+                'sources': _sources(data, provinces),
+                'provinces': provinces
+            }
+            for name in SERIES:
+                metadata['tables'][name]['provenance'] = data.provenance(name)
+            info['rows'] = len(temperature)
+
+        with open(os.path.join(temp_path, METADATA_FILE), 'w', encoding='utf-8') as file:
+            json.dump(metadata, file, indent=2)
+
+        if os.path.exists(output):
+            shutil.rmtree(output)
+        os.replace(temp_path, output)
+    finally:
+        if os.path.exists(temp_path):
+            shutil.rmtree(temp_path)
+    return metadata
+
+
+def read_export(path: str) -> ExportedData:
+    """Return the data of the export directory at path.
+
+    Raise ValueError if the directory was written with another layout version.
+    """
+    with open(os.path.join(path, METADATA_FILE), encoding='utf-8') as file:
+        metadata = json.load(file)
+    if metadata.get('version') != EXPORT_VERSION:
+        raise ValueError(f'unsupported export version {metadata.get("version")!r}')
+    return ExportedData(path, metadata)
+
+
+def _write_table(directory: str, columns: Dict[str, numpy.ndarray]) -> Dict[str, Any]:
+    """Write every column of a table to its own .npy file in directory, and return the
+    description of the table stored in the metadata file.
+    """
+    os.makedirs(directory)
+    for name, column in columns.items():
+        numpy.save(os.path.join(directory, f'{name}.npy'), numpy.ascontiguousarray(column),
+                   allow_pickle=False)
+
+    description = {
+        'rows': len(next(iter(columns.values()))) if columns else 0,
+        'columns': {name: column.dtype.str for name, column in columns.items()}
+    }
+    if 'year' in columns and len(columns['year']) > 0:
+        description['years'] = [int(columns['year'].min()), int(columns['year'].max())]
+    return description
+
+
+def _sources(data: ClimateDataset, provinces: List[str]) -> Dict[str, str]:
+    """Return the SHA-256 digest of every source file of the exported data, by path, as
+    recorded by data when it read the file.
+    """
+    sources = {}
+    for name in provinces + list(SERIES) + list(CURVES):
+        sources.update(data.provenance(name))
+    return sources
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the command given by argv."""
+    parser = argparse.ArgumentParser(description='Export the processed data to columnar files.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_parser = commands.add_parser('export', help='write an export directory')
+    export_parser.add_argument('output')
+    inspect_parser = commands.add_parser('inspect', help='describe an export directory')
+    inspect_parser.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        metadata = export_dataset(ClimateDataset(), args.output)
+        print(f"Exported {len(metadata['tables'])} tables to {args.output}")
+    else:
+        exported = read_export(args.path)
+        for name in exported.tables():
+            description = exported.metadata['tables'][name]
+            years = description.get('years')
+            coverage = f'{years[0]}-{years[1]}' if years else ''
+            print(f"{name:>20}  {description['rows']:>8} rows  {coverage:>9}  "
+                  f"{', '.join(description['columns'])}")
+        for name, params in exported.metadata['curves'].items():
+            print(f'{name:>20}  {params}')
+
+
+if __name__ == '__main__':
+    main()
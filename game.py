@@ -13,26 +13,187 @@ Copyright Information
 
 This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
 """
-import math
-import random
+from __future__ import annotations
 
-import pygame
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import os
+import time
 
 from process_data import *
+from history import GameHistory, YearSeries, HISTORY_DTYPE
+from instrument import stage
+from models import LOG_MODEL, RECIPROCAL_MODEL, LINEAR_MODEL
+from plot_data import MAX_POINTS, make_trace, output_figure
+from simulation import START_YEAR, EMISSION_NOISE, DEFORESTATION_NOISE, HYDRO_PROBABILITY, \
+    HYDRO_DEFORESTATION
+from startup import LazyModule
+
+# The libraries that display the game and its graph, imported when first used
+pygame = LazyModule('pygame')
+subplots = LazyModule('plotly.subplots')
+
+
+# Define RGB colours
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+
+# The size of the screen, the font of all text, and the background image
+SCREEN_SIZE = (1280, 720)
+FONT_NAME = 'Comic Sans MS'
+BACKGROUND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images', 'background.jpg')
+
+# The maximum frame rate, and the delay and interval in milliseconds of a held key
+FPS = 30
+REPEAT_DELAY = 300
+REPEAT_INTERVAL = 50
+
+# The number of years over which the emission and deforestation curves are evaluated, and
+# the random numbers are drawn, at once
+PROJECTION_BLOCK = 256
+
+# The random numbers drawn for each year: whether a hydroelectric reservoir is developed,
+# the noise of the emission and of the deforestation, and the deforestation it causes
+DRAWS_PER_YEAR = 4
+
+# The version of the layout of saved game sessions
+SESSION_VERSION = 1
+
+# The fonts and the rendered static text used so far, which are only valid until
+# pygame.quit is called
+_FONTS = {}
+_TEXTS = {}
+
+
+def get_font(size: int) -> pygame.font.Font:
+    """Return the font of the given size, which is created only once."""
+    if size not in _FONTS:
+        _FONTS[size] = pygame.font.SysFont(FONT_NAME, size)
+    return _FONTS[size]
+
+
+def render_text(text: str, size: int, colour: Tuple[int, int, int]) -> pygame.Surface:
+    """Return text rendered with the font of the given size. Use this for text that
+    never changes, as every surface is kept.
+    """
+    key = (text, size, colour)
+    if key not in _TEXTS:
+        _TEXTS[key] = get_font(size).render(text, True, colour)
+    return _TEXTS[key]
+
+
+def release_fonts() -> None:
+    """Discard every font and rendered text kept so far. Call this before pygame.quit,
+    after which they can no longer be used.
+    """
+    _TEXTS.clear()
+    _FONTS.clear()
+
+
+class GameRenderer:
+    """Draws the game onto a screen, only redrawing the parts that change.
+
+    Every line of the prediction is made of a static label, a value, and a static
+    unit. The line is rendered again only when its value changes, and the returned
+    dirty rectangles cover only those lines.
+
+    Instance Attributes:
+        - screen: the surface on which the game is drawn
+        - background: the background image, converted to the format of screen
+
+    Sample usage:
+    >>> screen = pygame.display.set_mode(SCREEN_SIZE)
+    >>> renderer = GameRenderer(screen)
+    >>> renderer.draw_all()
+    >>> pygame.display.update(renderer.draw_values(2020, 700.0, 30000.0, 14.0, False))
+    """
+    screen: pygame.Surface
+    background: pygame.Surface
+    _lines: Dict[str, Tuple[str, pygame.Rect]]
+
+    def __init__(self, screen: pygame.Surface, background: str = BACKGROUND) -> None:
+        """Initialize the renderer, loading the background image."""
+        self.screen = screen
+        self.background = pygame.image.load(background).convert()
+        self._lines = {}
+
+    def draw_all(self) -> None:
+        """Draw the background and the static text onto the whole screen."""
+        self.screen.blit(self.background, (0, 0))
+        self.screen.blit(render_text('Environmental Data Prediction', 48, BLACK), (80, 60))
+        self.screen.blit(render_text('Press the SPACEBAR to predict the environmental data '
+                                     'for the following year.', 24, BLACK), (80, 600))
+        self._lines = {}
+
+    def draw_values(self, year: int, emission: float, deforestation: float,
+                    temperature: float, hydro: bool) -> List[pygame.Rect]:
+        """Draw the given values and return the rectangles of the screen that changed."""
+        lines = [
+            ('year', 'Year: ', str(year), '', 180),
+            ('emission', 'Emission: ', str(round(emission, 3)),
+             ' Megatonnes of CO2 Equivalent', 270),
+            ('deforestation', 'Deforestation: ', str(round(deforestation, 3)), ' Hectares', 360),
+            ('temperature', 'Temperature: ', str(round(temperature, 3)), ' Degrees Celsius', 450)
+        ]
+        dirty = []
+        for key, label, value, unit, y in lines:
+            rect = self._draw_line(key, [(label, BLACK), (value, BLACK), (unit, BLACK)], 32, y)
+            if rect is not None:
+                dirty.append(rect)
+
+        hydro_message = 'During the hydroelectric reservoir development this year, ' \
+                        'large forest areas are flooded.' if hydro else ''
+        rect = self._draw_line('hydro', [(hydro_message, RED)], 24, 540)
+        if rect is not None:
+            dirty.append(rect)
+
+        return dirty
+
+    def _draw_line(self, key: str, pieces: List[Tuple[str, Tuple[int, int, int]]],
+                   size: int, y: int) -> Optional[pygame.Rect]:
+        """Draw the pieces of text side by side at height y, replacing the previous line
+        with the given key, and return the rectangle that changed. Return None if the
+        line is the same as before.
+
+        Every piece but the second is static text.
+        """
+        text = ''.join(piece for piece, _ in pieces)
+        previous = self._lines.get(key)
+        if previous is not None and previous[0] == text:
+            return None
+
+        x = 80
+        rect = pygame.Rect(x, y, 0, 0)
+        if previous is not None:
+            self.screen.blit(self.background, previous[1], previous[1])
+
+        for i, (piece, colour) in enumerate(pieces):
+            if piece == '':
+                continue
+            if i == 1:
+                surface = get_font(size).render(piece, True, colour)
+            else:
+                surface = render_text(piece, size, colour)
+            piece_rect = self.screen.blit(surface, (x, y))
+            rect.union_ip(piece_rect)
+            x = piece_rect.right
+
+        self._lines[key] = (text, rect)
+        return rect if previous is None else rect.union(previous[1])
 
 
 class TemperatureGame:
     """A simulation of Canada's temperature.
 
     Instance Attributes:
+        - history: emission, deforestation and temperature of each year
         - emission: mapping of year to emission (Megatonnes of CO2 equivalent)
         - deforestation: mapping of year to deforestation (Hectares)
         - temperature: mapping of year to temperature (Degrees Celcius)
         - emission_predict: prediction curve of emission
         - deforestation_predict: prediction curve of deforestation
         - correlation: correlation between temperature and (emission and deforestation)
+        - start_temp: temperature of the first year
+        - seed: the seed of every random number of the game, so that the same parameters
+          and seed always give the same game
 
     Representation Invariants:
         - all(k >= 2020 for k in self.emission)
@@ -44,75 +205,208 @@ class TemperatureGame:
     Sample usage:
     >>> game = TemperatureGame(EMISSION_CURVE, DEFORESTATION_REST_CURVE, FINAL_CORRELATION, 14)
     >>> game.run()
+    >>> game.save('session.npz')
     """
-    emission: Dict[int, float]
-    deforestation: Dict[int, float]
-    temperature: Dict[int, float]
+    __slots__ = ('history', 'emission_predict', 'deforestation_predict', 'correlation',
+                 'start_temp', 'seed', '_projection', '_draws')
+    history: GameHistory
     emission_predict: Tuple[float, float, float]
     deforestation_predict: Tuple[float, float, float]
     correlation: Tuple[float, float, float, float, float]
+    start_temp: float
+    seed: int
+    # The first year, the curves, and the emission and deforestation of the latest block
+    # of projected years
+    _projection: Tuple[int, Tuple[Tuple[float, ...], ...], List[float], List[float]]
+    # The index and the random numbers of the latest block of drawn years
+    _draws: Tuple[int, List[List[float]]]
 
     def __init__(self, emission_predict: Tuple[float, float, float],
                  deforestation_predict: Tuple[float, float, float],
                  correlation: Tuple[float, float, float, float, float],
-                 start_temp: float) -> None:
-        """Initializes the game."""
+                 start_temp: float, max_history: Optional[int] = None,
+                 seed: Optional[int] = None) -> None:
+        """Initializes the game.
 
-        # Avoid python_ta from yelling at me for not initializing those
-        # three classes before calling a method
-        self.emission = {}
-        self.deforestation = {}
-        self.temperature = {}
-
-        # Actually initialize the game
+        If max_history is not None, only the latest max_history years are kept. If seed
+        is None, a new seed is chosen at random.
+        """
         self.emission_predict = emission_predict
         self.deforestation_predict = deforestation_predict
         self.correlation = correlation
-        self.emission = {2020: self.predict_emission(2020)}
-        self.deforestation = {2020: self.predict_deforestation(2020)}
-        self.temperature = {2020: start_temp}
+        self.start_temp = start_temp
+        self.seed = new_seed() if seed is None else seed
+        self._projection = (START_YEAR, (), [], [])
+        self._draws = (-1, [])
+        self.history = GameHistory(START_YEAR, max_length=max_history)
+        self.history.append(self.predict_emission(START_YEAR),
+                            self.predict_deforestation(START_YEAR), start_temp)
+
+    @property
+    def emission(self) -> YearSeries:
+        """Mapping of year to emission (Megatonnes of CO2 equivalent)."""
+        return YearSeries(self.history, 'emission')
+
+    @property
+    def deforestation(self) -> YearSeries:
+        """Mapping of year to deforestation (Hectares)."""
+        return YearSeries(self.history, 'deforestation')
+
+    @property
+    def temperature(self) -> YearSeries:
+        """Mapping of year to temperature (Degrees Celsius)."""
+        return YearSeries(self.history, 'temperature')
 
     def predict_emission(self, year: int) -> float:
         """Predict the emission value of the following year."""
-        a, b, c = self.emission_predict
-        return a * math.log(year - b) + c + random.uniform(-30, 30)
+        return self._curve_values(year)[0] + \
+            _uniform(-EMISSION_NOISE, EMISSION_NOISE, self._year_draws(year)[1])
 
     def predict_deforestation(self, year: int) -> float:
         """Predict the deforestation value of the following year."""
-        a, b, c = self.deforestation_predict
-        return a / (year - b) + c + random.uniform(-3000, 3000)
+        return self._curve_values(year)[1] + \
+            _uniform(-DEFORESTATION_NOISE, DEFORESTATION_NOISE, self._year_draws(year)[2])
+
+    def _curve_values(self, year: int) -> Tuple[float, float]:
+        """Return the values of the emission and deforestation curves at the given year,
+        evaluating both curves over PROJECTION_BLOCK years at a time.
+
+        The blocks always start PROJECTION_BLOCK years apart from START_YEAR, so a year
+        is evaluated the same way whatever year the game resumed from.
+        """
+        curves = (self.emission_predict, self.deforestation_predict)
+        start, projected, emission, deforestation = self._projection
+        if projected != curves or not 0 <= year - start < len(emission):
+            start = year - (year - START_YEAR) % PROJECTION_BLOCK
+            years = numpy.arange(start, start + PROJECTION_BLOCK)
+            emission = LOG_MODEL.evaluate(years, curves[0]).tolist()
+            deforestation = RECIPROCAL_MODEL.evaluate(years, curves[1]).tolist()
+            self._projection = (start, curves, emission, deforestation)
+        return (emission[year - start], deforestation[year - start])
+
+    def _year_draws(self, year: int) -> List[float]:
+        """Return the DRAWS_PER_YEAR random numbers of the given year, drawing those of
+        PROJECTION_BLOCK years at a time.
+        """
+        block, draws = self._draws
+        index = year - START_YEAR
+        if index // PROJECTION_BLOCK != block:
+            block = index // PROJECTION_BLOCK
+            draws = draw_block(self.seed, block).tolist()
+            self._draws = (block, draws)
+        return draws[index % PROJECTION_BLOCK]
 
     def predict_temperature(self, emission: float, deforestation: float,
                             temp_current_year: float) -> float:
         """Predict the temperature value of the following year."""
-        a, b, c, d, e = self.correlation
-        change = abs(a) * (emission - b) + abs(c) * (deforestation - d) + e
-        return temp_current_year + change
+        return temp_current_year + LINEAR_MODEL.at((emission, deforestation), self.correlation)
+
+    def step(self) -> bool:
+        """Predict and store the values of the year following the latest stored year,
+        and return whether a hydroelectric reservoir is developed that year.
+        """
+        year = self.history.end_year
+        draws = self._year_draws(year + 1)
+        hydro = draws[0] < HYDRO_PROBABILITY
+        emission = self.predict_emission(year + 1)
+        deforestation = self.predict_deforestation(year + 1)
+        if hydro:
+            deforestation += _uniform(*HYDRO_DEFORESTATION, draws[3])
+        temperature = self.predict_temperature(emission, deforestation,
+                                               self.history.value('temperature', year))
+
+        self.history.append(emission, deforestation, temperature)
+        return hydro
+
+    def save(self, path: str) -> None:
+        """Write the parameters, seed and history of this game to the file path, from
+        which load restores it.
+
+        The session is written to a temporary file first, so that an existing session at
+        path is only replaced once the new one is completely written.
+        """
+        max_history = self.history.max_length
+        with open(path + '.tmp', 'wb') as file:
+            numpy.savez(file, _version=SESSION_VERSION,
+                        emission_predict=self.emission_predict,
+                        deforestation_predict=self.deforestation_predict,
+                        correlation=self.correlation, start_temp=self.start_temp,
+                        seed=numpy.uint64(self.seed), start_year=self.history.start_year,
+                        max_history=-1 if max_history is None else max_history,
+                        history=self.history.view())
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def load(path: str) -> TemperatureGame:
+        """Return the game saved to the file path, which continues exactly as the saved
+        game would have.
+
+        Raise ValueError if the file was written with another layout version.
+        """
+        with numpy.load(path, allow_pickle=False) as saved:
+            version = int(saved['_version']) if '_version' in saved.files else None
+            if version != SESSION_VERSION:
+                raise ValueError(f'unsupported session version {version!r}')
+            max_history = int(saved['max_history'])
+            game = TemperatureGame(tuple(saved['emission_predict'].tolist()),
+                                   tuple(saved['deforestation_predict'].tolist()),
+                                   tuple(saved['correlation'].tolist()),
+                                   float(saved['start_temp']),
+                                   None if max_history < 0 else max_history,
+                                   int(saved['seed']))
+            game.history = GameHistory.from_records(int(saved['start_year']), saved['history'],
+                                                    game.history.max_length)
+        return game
+
+    @staticmethod
+    def replay(emission_predict: Tuple[float, float, float],
+               deforestation_predict: Tuple[float, float, float],
+               correlation: Tuple[float, float, float, float, float],
+               start_temp: float, seed: int, n_years: int,
+               max_history: Optional[int] = None) -> TemperatureGame:
+        """Return the game with the given parameters and seed after n_years steps,
+        computing every year at once rather than stepping through them.
+
+        Preconditions:
+            - n_years >= 0
+        """
+        game = TemperatureGame(emission_predict, deforestation_predict, correlation,
+                               start_temp, max_history, seed)
+        records, _ = replay_years(emission_predict, deforestation_predict, correlation,
+                                  start_temp, seed, n_years)
+        game.history = GameHistory.from_records(START_YEAR, records, max_history)
+        return game
+
+    def verify(self) -> bool:
+        """Return whether every stored year of this game is exactly the one given by
+        replaying its parameters and seed.
+        """
+        records, _ = replay_years(self.emission_predict, self.deforestation_predict,
+                                  self.correlation, self.start_temp, self.seed,
+                                  self.history.end_year - START_YEAR)
+        stored = self.history.view()
+        return bool(numpy.array_equal(records[len(records) - len(stored):], stored))
 
     def predict_display(self, screen: pygame.Surface, new_year: int, new_emission: float,
                         new_deforestation: float, new_temperature: float) -> None:
         """Display the prediction of the following year, given all the values
         to be displayed.
         """
-        # Define RGB colours
-        black = (0, 0, 0)
-
-        # Create font and text
+        # Create text
         x_align = 80
-        font = pygame.font.SysFont('Comic Sans MS', 32)
-        font_title = pygame.font.SysFont('Comic Sans MS', 48)
-        title_text = font_title.render('Environmental Data Prediction', True, black)
+        font = get_font(32)
+        title_text = render_text('Environmental Data Prediction', 48, BLACK)
         title_rect = title_text.get_rect(topleft=(x_align, 60))
-        year_text = font.render(f'Year: {new_year}', True, black)
+        year_text = font.render(f'Year: {new_year}', True, BLACK)
         year_rect = year_text.get_rect(topleft=(x_align, 180))
         emission_text = font.render(f'Emission: {new_emission} Megatonnes of CO2 Equivalent',
-                                    True, black)
+                                    True, BLACK)
         emission_rect = emission_text.get_rect(topleft=(x_align, 270))
         deforestation_text = font.render(f'Deforestation: {new_deforestation} Hectares',
-                                         True, black)
+                                         True, BLACK)
         deforestation_rect = deforestation_text.get_rect(topleft=(x_align, 360))
         temperature_text = font.render(f'Temperature: {new_temperature} Degrees Celsius',
-                                       True, black)
+                                       True, BLACK)
         temperature_rect = temperature_text.get_rect(topleft=(x_align, 450))
 
         # Display text
@@ -122,97 +416,147 @@ class TemperatureGame:
         screen.blit(deforestation_text, deforestation_rect)
         screen.blit(temperature_text, temperature_rect)
 
-    def run(self) -> None:
-        """Run this game."""
+    def run(self, years_per_second: float = 0, max_years: Optional[int] = None,
+            headless: bool = False) -> Dict[str, Any]:
+        """Run this game and return statistics about the run.
+
+        Each press of the SPACEBAR advances the game by one year, and holding it repeats
+        it. If years_per_second is positive, the game also advances by itself at that rate,
+        using a fixed time step. The game ends when the window is closed, or after
+        max_years years if it is not None. While nothing happens, the loop sleeps until the
+        next event; otherwise it runs at most FPS frames per second.
+
+        If headless is True, the game is run without a display, frames are not limited
+        and every frame counts as 1 / FPS seconds of game time, and nothing is asked
+        at the end.
+
+        Preconditions:
+            - years_per_second >= 0
+            - not headless or (years_per_second > 0 and max_years is not None)
+        """
         # Initialize pygame
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
         pygame.init()
-
-        # Define RGB colours
-        black = (0, 0, 0)
-        red = (255, 0, 0)
+        pygame.key.set_repeat(REPEAT_DELAY, REPEAT_INTERVAL)
 
         # Create a screen
-        size = (1280, 720)
-        screen = pygame.display.set_mode(size)
-        background = pygame.image.load('images/background.jpg')
-        screen.blit(background, (0, 0))
-
-        # Create font and instruction text
-        font = pygame.font.SysFont('Comic Sans MS', 24)
-        instruction_text = font.render('Press the SPACEBAR to predict the environmental data '
-                                       'for the following year.', True, black)
-        instruction_rect = instruction_text.get_rect(topleft=(80, 600))
-        screen.blit(instruction_text, instruction_rect)
-
-        # Initialize current values
-        current_year = 2020
-        current_emission = round(self.emission[2020], 3)
-        current_deforestation = round(self.deforestation[2020], 3)
-        current_temperature = round(self.temperature[2020], 3)
-        self.predict_display(screen, current_year, current_emission,
-                             current_deforestation, current_temperature)
+        screen = pygame.display.set_mode(SCREEN_SIZE)
+        renderer = GameRenderer(screen)
+        clock = pygame.time.Clock()
+
+        year = self.history.end_year
+        renderer.draw_all()
+        renderer.draw_values(year, self.emission[year], self.deforestation[year],
+                             self.temperature[year], False)
         pygame.display.flip()
 
+        interval = 1 / years_per_second if years_per_second > 0 else None
+        elapsed = 0.0
+        years = 0
+        frame_times = []
+        start = time.perf_counter()
+        running = True
+
         # Event loop
-        while True:
-            # Process events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    # Exit the event loop
-                    pygame.quit()
-                    print('Thanks for playing!')
-                    graph = input('Do you want a statistical graph for your game? If so, input \'y\': ')
-                    if graph == 'y':
-                        self.print_graph()
-                    return
-                if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                    # Predict next year's values
-                    hydro = random.randint(1, 20) == 1
-                    current_year += 1
-                    current_emission = self.predict_emission(current_year)
-                    current_deforestation = self.predict_deforestation(current_year)
-                    if hydro:
-                        current_deforestation += random.uniform(20000, 30000)
-                    current_temperature = self.predict_temperature(
-                        current_emission, current_deforestation, current_temperature
-                    )
-
-                    # Store next year's values
-                    self.emission[current_year] = current_emission
-                    self.deforestation[current_year] = current_deforestation
-                    self.temperature[current_year] = current_temperature
-
-                    # Display the values
-                    background = pygame.image.load('images/background.jpg')
-                    screen.blit(background, (0, 0))
-                    screen.blit(instruction_text, instruction_rect)
-                    self.predict_display(screen, current_year, round(current_emission, 3),
-                                         round(current_deforestation, 3),
-                                         round(current_temperature, 3))
-                    if hydro:
-                        hydro_text = font.render('During the hydroelectric reservoir development this year, '
-                                                 'large forest areas are flooded.', True, red)
-                        hydro_rect = hydro_text.get_rect(topleft=(80, 540))
-                        screen.blit(hydro_text, hydro_rect)
-                    pygame.display.flip()
-
-    def print_graph(self) -> None:
-        """Print a statistical graph for the game."""
-        years = list(self.temperature.keys())
+        while running:
+            if interval is None:
+                # Sleep until something happens
+                events = [pygame.event.wait()] + pygame.event.get()
+            else:
+                events = pygame.event.get()
+            frame_start = time.perf_counter()
+
+            with stage('frame') as info:
+                # Process events
+                steps = 0
+                hydro = False
+                for event in events:
+                    if event.type == pygame.QUIT:
+                        running = False
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                        # Predict next year's values
+                        hydro = self.step()
+                        steps += 1
+
+                # Advance by itself for every full interval of game time
+                if interval is not None:
+                    while elapsed >= interval and \
+                            (max_years is None or years + steps < max_years):
+                        hydro = self.step()
+                        steps += 1
+                        elapsed -= interval
+
+                years += steps
+                if max_years is not None and years >= max_years:
+                    running = False
+
+                if steps > 0:
+                    # Display the values of the latest year
+                    year = self.history.end_year
+                    dirty = renderer.draw_values(year, self.emission[year],
+                                                 self.deforestation[year],
+                                                 self.temperature[year], hydro)
+                    pygame.display.update(dirty)
+                info['steps'] = steps
+
+            frame_times.append(time.perf_counter() - frame_start)
+            if headless:
+                elapsed += 1 / FPS
+            else:
+                elapsed += clock.tick(FPS) / 1000
+
+        # Exit the game
+        release_fonts()
+        pygame.quit()
+        stats = self._run_stats(years, frame_times, time.perf_counter() - start)
+        if not headless:
+            print('Thanks for playing!')
+            graph = input('Do you want a statistical graph for your game? If so, input \'y\': ')
+            if graph == 'y':
+                self.print_graph()
+
+        return stats
+
+    def _run_stats(self, years: int, frame_times: List[float], seconds: float) -> Dict[str, Any]:
+        """Return the statistics of a run that advanced the given number of years, with the
+        given processing time of each frame, in the given number of seconds.
+        """
+        year = self.history.end_year
+        frame_ms = numpy.array(frame_times) * 1000
+        return {
+            'years': years,
+            'frames': len(frame_times),
+            'seconds': seconds,
+            'frame_ms_mean': float(frame_ms.mean()) if len(frame_ms) else 0.0,
+            'frame_ms_p95': float(numpy.percentile(frame_ms, 95)) if len(frame_ms) else 0.0,
+            'frame_ms_max': float(frame_ms.max()) if len(frame_ms) else 0.0,
+            'final': {'year': year, 'emission': self.emission[year],
+                      'deforestation': self.deforestation[year],
+                      'temperature': self.temperature[year]}
+        }
+
+    def print_graph(self, output: Optional[str] = None, max_points: int = MAX_POINTS) -> None:
+        """Print a statistical graph for the game.
+
+        Each series is downsampled to max_points points. If output is not None, the
+        graph is written to that file instead of shown.
+        """
+        years = self.history.years()
 
         # Initialize figure with subplots
-        fig = make_subplots(rows=3, cols=1, subplot_titles=(
+        fig = subplots.make_subplots(rows=3, cols=1, subplot_titles=(
             'Emission Data', 'Deforestation Data', 'Temperature Data'))
 
         # Add traces
-        fig.add_trace(go.Scatter(x=years, y=list(self.emission.values()),
-                                 mode='lines+markers', name='Emission Data'),
+        fig.add_trace(make_trace(years, self.history.view('emission'), mode='lines+markers',
+                                 name='Emission Data', max_points=max_points),
                       row=1, col=1)
-        fig.add_trace(go.Scatter(x=years, y=list(self.deforestation.values()),
-                                 mode='lines+markers', name='Deforestation Data'),
+        fig.add_trace(make_trace(years, self.history.view('deforestation'), mode='lines+markers',
+                                 name='Deforestation Data', max_points=max_points),
                       row=2, col=1)
-        fig.add_trace(go.Scatter(x=years, y=list(self.temperature.values()),
-                                 mode='lines+markers', name='Temperature Data'),
+        fig.add_trace(make_trace(years, self.history.view('temperature'), mode='lines+markers',
+                                 name='Temperature Data', max_points=max_points),
                       row=3, col=1)
 
         # Update x-axis properties
@@ -227,7 +571,73 @@ class TemperatureGame:
 
         # Show graph
         fig.update_layout(title='Statistical Graph For Your Game')
-        fig.show()
+        output_figure(fig, output)
+
+
+def new_seed() -> int:
+    """Return a new random seed for a game."""
+    return int(numpy.random.SeedSequence().generate_state(1, numpy.uint64)[0])
+
+
+def draw_block(seed: int, block: int) -> numpy.ndarray:
+    """Return the random numbers of the given block of PROJECTION_BLOCK years of the game
+    with the given seed, with one row of DRAWS_PER_YEAR numbers per year.
+
+    The numbers of every year come from a single stream, which is moved to the start of
+    the block without drawing the numbers before it.
+    """
+    bit_generator = numpy.random.PCG64(seed)
+    bit_generator.advance(block * PROJECTION_BLOCK * DRAWS_PER_YEAR)
+    return numpy.random.Generator(bit_generator).random((PROJECTION_BLOCK, DRAWS_PER_YEAR))
+
+
+def replay_years(emission_predict: Tuple[float, float, float],
+                 deforestation_predict: Tuple[float, float, float],
+                 correlation: Tuple[float, float, float, float, float],
+                 start_temp: float, seed: int, n_years: int) -> \
+        Tuple[numpy.ndarray, numpy.ndarray]:
+    """Return the records of HISTORY_DTYPE of the first n_years + 1 years of the game with
+    the given parameters and seed, and whether a hydroelectric reservoir is developed in
+    each year.
+
+    The records are exactly the ones stepping through the game gives, but every year is
+    computed at once.
+
+    Preconditions:
+        - n_years >= 0
+    """
+    n_blocks = n_years // PROJECTION_BLOCK + 1
+    years = numpy.arange(START_YEAR, START_YEAR + n_blocks * PROJECTION_BLOCK)
+    draws = numpy.random.Generator(numpy.random.PCG64(seed)).random(
+        (n_blocks * PROJECTION_BLOCK, DRAWS_PER_YEAR))[:n_years + 1]
+
+    # The curves are evaluated over the same blocks of years as in TemperatureGame
+    years = years.reshape(n_blocks, PROJECTION_BLOCK)
+    emission = LOG_MODEL.evaluate(years, emission_predict).ravel()[:n_years + 1]
+    emission += _uniform(-EMISSION_NOISE, EMISSION_NOISE, draws[:, 1])
+    deforestation = RECIPROCAL_MODEL.evaluate(years, deforestation_predict).ravel()[:n_years + 1]
+    deforestation += _uniform(-DEFORESTATION_NOISE, DEFORESTATION_NOISE, draws[:, 2])
+
+    # There is never a hydroelectric development in the first year
+    hydro = draws[:, 0] < HYDRO_PROBABILITY
+    hydro[0] = False
+    deforestation[hydro] += _uniform(*HYDRO_DEFORESTATION, draws[hydro, 3])
+
+    change = LINEAR_MODEL.evaluate((emission, deforestation), correlation)
+    change[0] = start_temp
+
+    records = numpy.empty(n_years + 1, dtype=HISTORY_DTYPE)
+    records['emission'] = emission
+    records['deforestation'] = deforestation
+    records['temperature'] = numpy.cumsum(change)
+    return (records, hydro)
+
+
+def _uniform(low: float, high: float, draw: Any) -> Any:
+    """Return the number between low and high given by the uniform random number draw
+    between 0 and 1, like numpy.random.Generator.uniform.
+    """
+    return low + (high - low) * draw
 
 
 if __name__ == '__main__':
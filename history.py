@@ -0,0 +1,195 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module contains the GameHistory class, which stores the
+yearly values predicted by the simulation game in 'game.py' in a single
+numpy array, so that long games use little memory and their data can be
+plotted or exported without copying.
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+from typing import Iterator, Mapping, Optional
+
+import numpy
+
+# The values stored for each year of a game
+HISTORY_DTYPE = numpy.dtype([('emission', numpy.float64),
+                             ('deforestation', numpy.float64),
+                             ('temperature', numpy.float64)])
+
+
+class GameHistory:
+    """The yearly values of a game, stored in one contiguous structured array that
+    grows by doubling its capacity.
+
+    If max_length is not None, the history is a ring buffer that keeps only the latest
+    max_length years, so that a game can run for any number of years in bounded memory.
+
+    Instance Attributes:
+        - start_year: the earliest year stored
+        - max_length: the maximum number of years stored, or None for no maximum
+
+    Representation Invariants:
+        - self.max_length is None or len(self) <= self.max_length
+
+    Sample usage:
+    >>> history = GameHistory(2020)
+    >>> history.append(700.0, 30000.0, 14.0)
+    2020
+    >>> history.append(710.0, 31000.0, 14.5)
+    2021
+    >>> history.value('temperature', 2021)
+    14.5
+    >>> history.view('emission').tolist()
+    [700.0, 710.0]
+    """
+    __slots__ = ('start_year', 'max_length', '_buffer', '_head', '_length')
+    start_year: int
+    max_length: Optional[int]
+    _buffer: numpy.ndarray
+    _head: int
+    _length: int
+
+    def __init__(self, start_year: int, capacity: int = 64,
+                 max_length: Optional[int] = None) -> None:
+        """Initialize an empty history whose first year will be start_year.
+
+        Preconditions:
+            - capacity > 0
+            - max_length is None or max_length > 0
+        """
+        if max_length is not None:
+            capacity = min(capacity, max_length)
+        self.start_year = start_year
+        self.max_length = max_length
+        self._buffer = numpy.zeros(capacity, dtype=HISTORY_DTYPE)
+        self._head = 0
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @staticmethod
+    def from_records(start_year: int, records: numpy.ndarray,
+                     max_length: Optional[int] = None) -> 'GameHistory':
+        """Return the history of the given records of HISTORY_DTYPE, the first of which
+        is the record of start_year.
+
+        If max_length is not None, only the latest max_length records are kept.
+        """
+        if max_length is not None and len(records) > max_length:
+            start_year += len(records) - max_length
+            records = records[len(records) - max_length:]
+        history = GameHistory(start_year, max(len(records), 1), max_length)
+        history._buffer[:len(records)] = records
+        history._length = len(records)
+        return history
+
+    @property
+    def end_year(self) -> int:
+        """The latest year stored, or start_year - 1 if the history is empty."""
+        return self.start_year + self._length - 1
+
+    def append(self, emission: float, deforestation: float, temperature: float) -> int:
+        """Store the values of the year following end_year and return that year.
+
+        If the history is a full ring buffer, the earliest year is discarded.
+        """
+        capacity = len(self._buffer)
+        if self._length == capacity:
+            if self.max_length is not None and capacity == self.max_length:
+                self._buffer[self._head] = (emission, deforestation, temperature)
+                self._head = (self._head + 1) % capacity
+                self.start_year += 1
+                return self.end_year
+            self._grow()
+
+        index = (self._head + self._length) % len(self._buffer)
+        self._buffer[index] = (emission, deforestation, temperature)
+        self._length += 1
+        return self.end_year
+
+    def _grow(self) -> None:
+        """Double the capacity of the buffer, up to max_length."""
+        capacity = 2 * len(self._buffer)
+        if self.max_length is not None:
+            capacity = min(capacity, self.max_length)
+        buffer = numpy.zeros(capacity, dtype=HISTORY_DTYPE)
+        buffer[:self._length] = self._ordered()
+        self._buffer = buffer
+        self._head = 0
+
+    def _ordered(self) -> numpy.ndarray:
+        """Return the stored records from the earliest to the latest year."""
+        end = self._head + self._length
+        if end <= len(self._buffer):
+            return self._buffer[self._head:end]
+        return numpy.concatenate((self._buffer[self._head:],
+                                  self._buffer[:end - len(self._buffer)]))
+
+    def value(self, field: str, year: int) -> float:
+        """Return the value of the given field in the given year.
+
+        Raise KeyError if the year is not stored.
+        """
+        offset = year - self.start_year
+        if not 0 <= offset < self._length:
+            raise KeyError(year)
+        return float(self._buffer[field][(self._head + offset) % len(self._buffer)])
+
+    def years(self) -> numpy.ndarray:
+        """Return the stored years, from the earliest to the latest."""
+        return numpy.arange(self.start_year, self.start_year + self._length)
+
+    def view(self, field: Optional[str] = None) -> numpy.ndarray:
+        """Return the values of the given field, or the records if field is None, from the
+        earliest to the latest year.
+
+        The result is a view of the buffer rather than a copy, and is only valid until the
+        next call to append.
+        """
+        if self._head + self._length > len(self._buffer):
+            # The ring buffer wraps around, so rotate it to make the records contiguous
+            self._buffer[:self._length] = self._ordered()
+            self._head = 0
+        records = self._buffer[self._head:self._head + self._length]
+        return records if field is None else records[field]
+
+
+class YearSeries(Mapping):
+    """A read-only mapping of year to the values of one field of a GameHistory.
+
+    Instance Attributes:
+        - history: the history containing the values
+        - field: the name of the field
+    """
+    __slots__ = ('history', 'field')
+    history: GameHistory
+    field: str
+
+    def __init__(self, history: GameHistory, field: str) -> None:
+        self.history = history
+        self.field = field
+
+    def __getitem__(self, year: int) -> float:
+        return self.history.value(self.field, year)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self.history.start_year, self.history.end_year + 1))
+
+    def __reversed__(self) -> Iterator[int]:
+        return iter(range(self.history.end_year, self.history.start_year - 1, -1))
+
+    def __len__(self) -> int:
+        return len(self.history)
+
+
+if __name__ == '__main__':
+    import python_ta.contracts
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
@@ -0,0 +1,277 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module records how long each stage of the data pipeline and
+the simulation game takes, with row counts, bytes read and allocated
+memory, and sends these records as events to one or more sinks.
+
+Recording is off unless it is turned on with the instrumented() context
+manager, or with the CLIMATE_INSTRUMENT environment variable set to 'log',
+'memory', or 'jsonl:<path>'. While it is off, stages cost next to nothing.
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+
+from typing import List, Dict, Any, Callable, Collection, Optional, TextIO, Union
+
+# The environment variable that turns recording on when this module is imported
+ENV_VARIABLE = 'CLIMATE_INSTRUMENT'
+
+# The number of functions listed in the profile of a stage
+PROFILE_LINES = 20
+
+# The sinks that receive every event
+_SINKS = []
+
+# The stages to profile (True for all), whether the memory allocated in each stage is
+# traced, and whether a stage is being profiled, since profilers cannot be nested
+_STATE = {'profile': set(), 'trace_memory': False, 'profiling': False}
+
+# The stages tracing memory that are running, from the outermost to the innermost
+_TRACED = []
+
+
+class MemorySink:
+    """A sink that keeps every event in a list.
+
+    Instance Attributes:
+        - events: the events received so far
+    """
+    events: List[Dict[str, Any]]
+
+    def __init__(self) -> None:
+        self.events = []
+
+    def __call__(self, event: Dict[str, Any]) -> None:
+        self.events.append(event)
+
+    def by_stage(self, stage: str) -> List[Dict[str, Any]]:
+        """Return the events of the stage with the given name."""
+        return [event for event in self.events if event['stage'] == stage]
+
+
+class JsonLinesSink:
+    """A sink that writes every event as one line of JSON to a file.
+
+    Instance Attributes:
+        - file: the open file the events are written to
+    """
+    file: TextIO
+
+    def __init__(self, file: Union[str, TextIO]) -> None:
+        """Initialize the sink, appending to the file at the given path, or writing to
+        the given open file.
+        """
+        self.file = open(file, 'a', encoding='utf-8') if isinstance(file, str) else file
+
+    def __call__(self, event: Dict[str, Any]) -> None:
+        self.file.write(json.dumps(event, default=str) + '\n')
+        self.file.flush()
+
+
+class LogSink:
+    """A sink that writes every event to a logger.
+
+    Instance Attributes:
+        - logger: the logger the events are written to
+        - level: the level of the log records
+    """
+    logger: logging.Logger
+    level: int
+
+    def __init__(self, logger: Optional[logging.Logger] = None,
+                 level: int = logging.INFO) -> None:
+        self.logger = logger or logging.getLogger('climate.instrument')
+        self.level = level
+
+    def __call__(self, event: Dict[str, Any]) -> None:
+        fields = ' '.join(f'{key}={value}' for key, value in event.items()
+                          if key not in {'stage', 'seconds', 'time', 'profile'})
+        self.logger.log(self.level, '%s %.6fs %s', event['stage'], event['seconds'], fields)
+
+
+class Stage:
+    """A context manager that records one event about the code it wraps, named after
+    the given stage, if recording is on when it is entered.
+
+    The context manager gives a dict to which the wrapped code can add fields, such as
+    'rows' or 'bytes'. The event also includes the wall time in seconds, the peak memory
+    allocated if memory is traced, and a profile if the stage is profiled. The peak
+    memory of a stage includes the peaks of the stages nested in it.
+
+    Sample usage:
+    >>> with instrumented(MemorySink()) as sink:
+    ...     with stage('example', file='a.csv') as info:
+    ...         info['rows'] = 10
+    >>> sink.events[0]['rows']
+    10
+    """
+    __slots__ = ('name', 'info', '_active', '_start', '_profiler', '_tracing', '_start_bytes',
+                 '_peak')
+    name: str
+    info: Dict[str, Any]
+
+    def __init__(self, name: str, **fields: Any) -> None:
+        self.name = name
+        self.info = fields
+
+    def __enter__(self) -> Dict[str, Any]:
+        self._active = bool(_SINKS)
+        self._start = 0.0
+        self._profiler = None
+        self._tracing = False
+        self._start_bytes = 0
+        self._peak = 0
+        if not self._active:
+            return self.info
+
+        profile = _STATE['profile']
+        if not _STATE['profiling'] and (profile is True or self.name in profile):
+            _STATE['profiling'] = True
+            self._profiler = cProfile.Profile()
+
+        self._tracing = _STATE['trace_memory']
+        if self._tracing:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            # Resetting the peak loses it for the running stages, so it is kept first
+            _fold_peak()
+            tracemalloc.reset_peak()
+            self._start_bytes = tracemalloc.get_traced_memory()[0]
+            _TRACED.append(self)
+
+        if self._profiler is not None:
+            self._profiler.enable()
+        self._start = time.perf_counter()
+        return self.info
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if not self._active:
+            return
+        seconds = time.perf_counter() - self._start
+
+        event = {'stage': self.name, 'seconds': seconds, 'time': time.time()}
+        if self._profiler is not None:
+            self._profiler.disable()
+            _STATE['profiling'] = False
+            text = io.StringIO()
+            pstats.Stats(self._profiler, stream=text).sort_stats('cumulative') \
+                .print_stats(PROFILE_LINES)
+            self.info['profile'] = text.getvalue()
+        if self._tracing:
+            _fold_peak()
+            _TRACED.remove(self)
+            self.info['alloc_peak_bytes'] = self._peak - self._start_bytes
+        if exc_info[0] is not None:
+            event['error'] = exc_info[0].__name__
+
+        event.update(self.info)
+        emit(event)
+
+
+def stage(name: str, **fields: Any) -> Stage:
+    """Return the Stage recording the code it wraps under the given name, with the given
+    fields.
+    """
+    return Stage(name, **fields)
+
+
+def _fold_peak() -> None:
+    """Record the peak memory traced since it was last reset in every running stage
+    that traces memory.
+    """
+    peak = tracemalloc.get_traced_memory()[1]
+    for running in _TRACED:
+        running._peak = max(running._peak, peak)
+
+
+def emit(event: Dict[str, Any]) -> None:
+    """Send event to every sink."""
+    for sink in _SINKS:
+        sink(event)
+
+
+def is_enabled() -> bool:
+    """Return whether recording is on."""
+    return bool(_SINKS)
+
+
+class Instrumented:
+    """A context manager that turns recording on while it is active, sending events to
+    the given sink (a MemorySink by default), which it gives to the with statement.
+
+    If profile is True, every stage is profiled with cProfile; otherwise the stages whose
+    names are in profile are. If trace_memory is True, the peak memory allocated in each
+    stage is traced with tracemalloc.
+    """
+    __slots__ = ('sink', 'profile', 'trace_memory', '_previous')
+    sink: Callable[[Dict[str, Any]], Any]
+
+    def __init__(self, sink: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 profile: Union[bool, Collection[str]] = (), trace_memory: bool = False) -> None:
+        self.sink = sink if sink is not None else MemorySink()
+        self.profile = profile if profile is True else set(profile)
+        self.trace_memory = trace_memory
+
+    def __enter__(self) -> Callable[[Dict[str, Any]], Any]:
+        self._previous = (_STATE['profile'], _STATE['trace_memory'])
+        _SINKS.append(self.sink)
+        if self.profile is True or _STATE['profile'] is True:
+            _STATE['profile'] = True
+        else:
+            _STATE['profile'] = _STATE['profile'] | self.profile
+        _STATE['trace_memory'] = _STATE['trace_memory'] or self.trace_memory
+        return self.sink
+
+    def __exit__(self, *exc_info: Any) -> None:
+        _SINKS.remove(self.sink)
+        _STATE['profile'], _STATE['trace_memory'] = self._previous
+
+
+def instrumented(sink: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 profile: Union[bool, Collection[str]] = (),
+                 trace_memory: bool = False) -> Instrumented:
+    """Return the Instrumented context manager turning recording on with the given sink
+    and options.
+    """
+    return Instrumented(sink, profile, trace_memory)
+
+
+def sink_from_spec(spec: str) -> Callable[[Dict[str, Any]], Any]:
+    """Return the sink described by spec, which is 'log', 'memory', or 'jsonl:<path>'.
+
+    Raise ValueError if spec is not one of these.
+    """
+    if spec == 'log':
+        return LogSink()
+    if spec == 'memory':
+        return MemorySink()
+    if spec.startswith('jsonl:'):
+        return JsonLinesSink(spec[len('jsonl:'):])
+    raise ValueError(f'unknown instrumentation sink {spec!r}')
+
+
+# Turn recording on for the whole process if the environment asks for it
+if os.environ.get(ENV_VARIABLE):
+    if os.environ[ENV_VARIABLE] == 'log':
+        logging.basicConfig(level=logging.INFO)
+    _SINKS.append(sink_from_spec(os.environ[ENV_VARIABLE]))
+
+
+if __name__ == '__main__':
+    import python_ta.contracts
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
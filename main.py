@@ -7,74 +7,117 @@ This Python module is responsible for running the simulation game
 that utilizes modules 'process_data.py' and 'game.py'. Run
 this file to start the simulation game.
 
+The processed data are available as module attributes (e.g. CANADA_MEDIAN
+or EMISSION_CURVE), which are only computed when first accessed.
+
 Copyright Information
 ===============================
 
 This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
 """
+from typing import Any
+
 from game import *
+from dataset import ClimateDataset
+
+# Processed data, loaded on first access
+DATASET = ClimateDataset()
+
+# The prefix of the module attributes of each province
+_PROVINCE_NAMES = {
+    'ALBERTA': 'AB',
+    'BRITISH_COLUMBIA': 'BC',
+    'MANITOBA': 'MB',
+    'NEW_BRUNSWICK': 'NB',
+    'NEWFOUNDLAND': 'NL',
+    'NORTHWEST': 'NT',
+    'NOVA_SCOTIA': 'NS',
+    'NUNAVUT': 'NU',
+    'ONTARIO': 'ON',
+    'PRINCE_EDWARD': 'PE',
+    'QUEBEC': 'QC',
+    'SASKATCHEWAN': 'SK',
+    'YUKON': 'YT'
+}
+
+# The module attributes backed by a ClimateDataset attribute of the same name in lowercase
+_DATASET_NAMES = {'CANADA_MEDIAN', 'EMISSION_DATA', 'EMISSION_CURVE', 'DEFORESTATION_DATA',
+                  'DEFORESTATION_HYDRO', 'DEFORESTATION_REST', 'DEFORESTATION_REST_CURVE',
+                  'TEMP_CHANGE', 'FINAL_DATA', 'FINAL_CORRELATION'}
+
+
+def __getattr__(name: str) -> Any:
+    """Return the processed data with the given module attribute name,
+    e.g. ALBERTA_TEMP, ALBERTA_MEDIAN or CANADA_MEDIAN.
+    """
+    if name in _DATASET_NAMES:
+        return getattr(DATASET, name.lower())
+
+    prefix, _, kind = name.rpartition('_')
+    if prefix in _PROVINCE_NAMES and kind in {'TEMP', 'MEDIAN'}:
+        prov = _PROVINCE_NAMES[prefix]
+        if prov in DATASET.missing_provinces():
+            raise AttributeError(f'{name} is unavailable: {DATASET.province_file(prov)} '
+                                 f'does not exist')
+        if kind == 'TEMP':
+            return DATASET.province_temp(prov)
+        return DATASET.province_median(prov)
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+# The names exported by 'from main import *', which loads the processed data of every
+# available province
+__all__ = [name for name in globals() if not name.startswith('_')] + \
+    sorted(_DATASET_NAMES) + \
+    [f'{prefix}_{kind}' for prefix, prov in _PROVINCE_NAMES.items()
+     if prov not in DATASET.missing_provinces() for kind in ('TEMP', 'MEDIAN')]
 
-# Processed temperature data for each province
-ALBERTA_TEMP = read_csv_temp('temperature/alberta.csv')
-BRITISH_COLUMBIA_TEMP = read_csv_temp('temperature/british_columbia.csv')
-MANITOBA_TEMP = read_csv_temp('temperature/manitoba.csv')
-NEW_BRUNSWICK_TEMP = read_csv_temp('temperature/new_brunswick.csv')
-NEWFOUNDLAND_TEMP = read_csv_temp('temperature/newfoundland.csv')
-NORTHWEST_TEMP = read_csv_temp('temperature/northwest.csv')
-NOVA_SCOTIA_TEMP = read_csv_temp('temperature/nova_scotia.csv')
-NUNAVUT_TEMP = read_csv_temp('temperature/nunavut.csv')
-ONTARIO_TEMP = read_csv_temp('temperature/ontario.csv')
-PRINCE_EDWARD_TEMP = read_csv_temp('temperature/prince_edward.csv')
-QUEBEC_TEMP = read_csv_temp('temperature/quebec.csv')
-SASKATCHEWAN_TEMP = read_csv_temp('temperature/saskatchewan.csv')
-YUKON_TEMP = read_csv_temp('temperature/yukon.csv')
-
-ALBERTA_MEDIAN = get_yearly_median_temp(ALBERTA_TEMP)
-BRITISH_COLUMBIA_MEDIAN = get_yearly_median_temp(BRITISH_COLUMBIA_TEMP)
-MANITOBA_MEDIAN = get_yearly_median_temp(MANITOBA_TEMP)
-NEW_BRUNSWICK_MEDIAN = get_yearly_median_temp(NEW_BRUNSWICK_TEMP)
-NEWFOUNDLAND_MEDIAN = get_yearly_median_temp(NEWFOUNDLAND_TEMP)
-NORTHWEST_MEDIAN = get_yearly_median_temp(NORTHWEST_TEMP)
-NOVA_SCOTIA_MEDIAN = get_yearly_median_temp(NOVA_SCOTIA_TEMP)
-NUNAVUT_MEDIAN = get_yearly_median_temp(NUNAVUT_TEMP)
-ONTARIO_MEDIAN = get_yearly_median_temp(ONTARIO_TEMP)
-PRINCE_EDWARD_MEDIAN = get_yearly_median_temp(PRINCE_EDWARD_TEMP)
-QUEBEC_MEDIAN = get_yearly_median_temp(QUEBEC_TEMP)
-SASKATCHEWAN_MEDIAN = get_yearly_median_temp(SASKATCHEWAN_TEMP)
-YUKON_MEDIAN = get_yearly_median_temp(YUKON_TEMP)
-
-CANADA_MEDIAN = {}
-for i in range(1991, 2020):
-    CANADA_MEDIAN[i] = (ALBERTA_MEDIAN[i] + BRITISH_COLUMBIA_MEDIAN[i] +
-                        MANITOBA_MEDIAN[i] + NEW_BRUNSWICK_MEDIAN[i] +
-                        NEWFOUNDLAND_MEDIAN[i] + NORTHWEST_MEDIAN[i] +
-                        NOVA_SCOTIA_MEDIAN[i] + NUNAVUT_MEDIAN[i] +
-                        ONTARIO_MEDIAN[i] + PRINCE_EDWARD_MEDIAN[i] +
-                        QUEBEC_MEDIAN[i] + SASKATCHEWAN_MEDIAN[i] +
-                        YUKON_MEDIAN[i]) / 13
-
-# Processed greenhouse gas emission data
-EMISSION_DATA = read_csv_emission('other_data/emission.csv')
-EMISSION_CURVE = model_emission(EMISSION_DATA)
-
-# Processed deforestation data
-DEFORESTATION_DATA = read_csv_deforestation('other_data/deforestation.csv')
-DEFORESTATION_HYDRO = read_csv_deforestation_hydro('other_data/deforestation.csv')
-DEFORESTATION_REST = {k: DEFORESTATION_DATA[k] - DEFORESTATION_HYDRO[k]
-                      for k in DEFORESTATION_DATA}
-DEFORESTATION_REST_CURVE = model_deforestation(DEFORESTATION_REST)
-
-# Processed correlation data
-TEMP_CHANGE = {k: CANADA_MEDIAN[k + 1] - CANADA_MEDIAN[k] for k in CANADA_MEDIAN
-               if k in range(1991, 2018)}
-FINAL_DATA = (
-    [TEMP_CHANGE[k] for k in TEMP_CHANGE if k in range(1991, 2018)],
-    [EMISSION_DATA[k] for k in EMISSION_DATA if k in range(1991, 2018)],
-    [DEFORESTATION_DATA[k] for k in DEFORESTATION_DATA if k in range(1991, 2018)]
-)
-FINAL_CORRELATION = model_correlation(FINAL_DATA)
 
 # Run the simulation game
 if __name__ == '__main__':
-    game = TemperatureGame(EMISSION_CURVE, DEFORESTATION_REST_CURVE, FINAL_CORRELATION, 14)
-    game.run()
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Run the simulation game.')
+    parser.add_argument('--auto', type=float, default=0, metavar='YEARS_PER_SECOND',
+                        help='advance the game by itself at this rate')
+    parser.add_argument('--years', type=int, help='end the game after this many years')
+    parser.add_argument('--max-history', type=int,
+                        help='only keep the data of this many latest years')
+    parser.add_argument('--headless', action='store_true',
+                        help='run without a display and print the final state and timings')
+    parser.add_argument('--seed', type=int, help='the seed of the random numbers of the game')
+    parser.add_argument('--load', metavar='SESSION', help='resume the game saved to this file')
+    parser.add_argument('--save', metavar='SESSION', help='save the game to this file at the end')
+    parser.add_argument('--replay', type=int, metavar='YEARS',
+                        help='compute this many years from the seed without running the game, '
+                             'and print the final state')
+    args = parser.parse_args()
+
+    if args.load:
+        game = TemperatureGame.load(args.load)
+    elif args.replay is not None:
+        game = TemperatureGame.replay(DATASET.emission_curve, DATASET.deforestation_rest_curve,
+                                      DATASET.final_correlation, 14,
+                                      new_seed() if args.seed is None else args.seed,
+                                      args.replay, args.max_history)
+    else:
+        game = TemperatureGame(DATASET.emission_curve, DATASET.deforestation_rest_curve,
+                               DATASET.final_correlation, 14, args.max_history, args.seed)
+
+    if args.replay is not None:
+        end_year = game.history.end_year
+        print(json.dumps({'seed': game.seed, 'year': end_year,
+                          'emission': game.emission[end_year],
+                          'deforestation': game.deforestation[end_year],
+                          'temperature': game.temperature[end_year]}, indent=2))
+    elif args.headless:
+        stats = game.run(args.auto or FPS, args.years or 100, headless=True)
+        stats['seed'] = game.seed
+        print(json.dumps(stats, indent=2))
+    else:
+        game.run(args.auto, args.years)
+
+    if args.save:
+        game.save(args.save)
@@ -0,0 +1,69 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module is a command line tool to manage the cache of parsed
+temperature data used by 'process_data.py'. Run this file with one of the
+following commands:
+
+    python manage_cache.py warm [FILE ...]
+    python manage_cache.py inspect
+    python manage_cache.py purge
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+import argparse
+import time
+
+from typing import List, Optional
+
+from dataset import ClimateDataset
+from process_data import CACHE_DIR, load_temperature_table, cache_entries, purge_cache
+
+
+def warm(filenames: List[str], cache_dir: str) -> None:
+    """Parse every file in filenames and store the results in cache_dir."""
+    for filename in filenames:
+        start = time.perf_counter()
+        table = load_temperature_table(filename, cache_dir)
+        elapsed = time.perf_counter() - start
+        print(f'{filename}: {len(table)} rows in {elapsed:.3f}s')
+
+
+def inspect(cache_dir: str) -> None:
+    """Print a description of every entry in cache_dir."""
+    entries = cache_entries(cache_dir)
+    for entry in entries:
+        print(f"{entry['status']:>8}  {entry['rows']:>8} rows  {entry['bytes']:>10} bytes  "
+              f"{entry['source']}")
+    print(f'{len(entries)} entries in {cache_dir}')
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the command given by argv."""
+    parser = argparse.ArgumentParser(description='Manage the cache of parsed temperature data.')
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    warm_parser = commands.add_parser('warm', help='parse files and store them in the cache')
+    warm_parser.add_argument('files', nargs='*')
+    commands.add_parser('inspect', help='describe the entries in the cache')
+    commands.add_parser('purge', help='remove every entry in the cache')
+    args = parser.parse_args(argv)
+
+    if args.command == 'warm':
+        # The temperature files of the project by default, wherever this is run from
+        data = ClimateDataset()
+        warm(args.files or [data.province_file(prov) for prov in data.available_provinces()],
+             args.cache_dir)
+    elif args.command == 'inspect':
+        inspect(args.cache_dir)
+    else:
+        print(f'Removed {purge_cache(args.cache_dir)} entries from {args.cache_dir}')
+
+
+if __name__ == '__main__':
+    main()
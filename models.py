@@ -0,0 +1,122 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module contains the curves used to model the emission,
+deforestation and temperature data. Each curve evaluates over arrays of
+points and of parameter sets in a single call, and checks that every
+point is in its domain.
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Sequence
+
+import numpy
+
+
+@dataclass(frozen=True)
+class CurveModel:
+    """A curve whose value at a point x depends on a fixed number of parameters.
+
+    Instance Attributes:
+        - name: the name of the model
+        - formula: the formula of the curve
+        - n_params: the number of parameters of the curve
+        - point_dims: the number of leading axes of x that make up one point
+        - function: the function computing the curve from x and each parameter, which
+          works on floats and on arrays that broadcast together
+        - domain: the function returning whether each point of x is in the domain of the
+          curve, taking the same arguments as function
+        - domain_text: the condition checked by domain
+
+    Representation Invariants:
+        - self.n_params > 0
+        - self.point_dims in {0, 1}
+
+    Sample usage:
+    >>> LOG_MODEL.evaluate([2020, 2021], (43.0, 1989.0, 589.0)).round(1).tolist()
+    [736.7, 738.0]
+    >>> LOG_MODEL.evaluate([2020, 2021], [(43.0, 1989.0, 589.0), (0.0, 0.0, 1.0)]).shape
+    (2, 2)
+    """
+    name: str
+    formula: str
+    n_params: int
+    point_dims: int
+    function: Callable[..., Any]
+    domain: Callable[..., Any]
+    domain_text: str
+
+    def evaluate(self, x: Any, params: Any) -> numpy.ndarray:
+        """Return the value of this curve at every point of x for every parameter set
+        of params.
+
+        params has the parameters of one set along its last axis, so the result has
+        the shape of params without its last axis followed by the shape of the points
+        of x. Raise ValueError if a point is outside the domain of the curve for some
+        parameter set.
+        """
+        x = numpy.asarray(x, dtype=numpy.float64)
+        params = numpy.asarray(params, dtype=numpy.float64)
+        if params.shape[-1:] != (self.n_params,):
+            raise ValueError(f'the {self.name} model takes {self.n_params} parameters, '
+                             f'got an array of shape {params.shape}')
+
+        shape = params.shape[:-1] + (1,) * (x.ndim - self.point_dims)
+        columns = [params[..., i].reshape(shape) for i in range(self.n_params)]
+        if not numpy.all(self.domain(x, *columns)):
+            raise ValueError(f'the {self.name} model is undefined unless {self.domain_text}')
+        return self.function(x, *columns)
+
+    def at(self, x: Any, params: Sequence[float]) -> float:
+        """Return the value of this curve at the single point x for a single parameter
+        set, without the overhead of evaluate.
+
+        Raise ValueError if x is outside the domain of the curve.
+        """
+        if not self.domain(x, *params):
+            raise ValueError(f'the {self.name} model is undefined unless {self.domain_text}')
+        return float(self.function(x, *params))
+
+
+def _log_curve(x: Any, a: Any, b: Any, c: Any) -> Any:
+    """Return y = a(ln(x - b)) + c."""
+    return a * numpy.log(x - b) + c
+
+
+def _reciprocal_curve(x: Any, a: Any, b: Any, c: Any) -> Any:
+    """Return y = a/(x - b) + c."""
+    return a / (x - b) + c
+
+
+def _linear_curve(x: Any, a: Any, b: Any, c: Any, d: Any, e: Any) -> Any:
+    """Return y = |a|(x[0] - b) + |c|(x[1] - d) + e."""
+    return abs(a) * (x[0] - b) + abs(c) * (x[1] - d) + e
+
+
+# The curve of the yearly emission
+LOG_MODEL = CurveModel('log', 'a(ln(x - b)) + c', 3, 0, _log_curve,
+                       lambda x, a, b, c: x - b > 0, 'x - b > 0')
+
+# The curve of the yearly deforestation
+RECIPROCAL_MODEL = CurveModel('reciprocal', 'a/(x - b) + c', 3, 0, _reciprocal_curve,
+                              lambda x, a, b, c: x - b != 0, 'x != b')
+
+# The curve of the yearly temperature change, where x[0] is the emission and x[1] is
+# the deforestation of the year
+LINEAR_MODEL = CurveModel('linear', '|a|(x[0] - b) + |c|(x[1] - d) + e', 5, 1, _linear_curve,
+                          lambda x, a, b, c, d, e: True, 'x is any pair of numbers')
+
+# Every model, by name
+MODELS = {model.name: model for model in (LOG_MODEL, RECIPROCAL_MODEL, LINEAR_MODEL)}
+
+
+if __name__ == '__main__':
+    import python_ta.contracts
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
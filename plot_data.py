@@ -0,0 +1,143 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module contains functions that help 'visualize_data.py' and
+'game.py' plot large data series with Plotly: downsampling the series
+before they are sent to the browser, choosing the WebGL renderer for many
+points, drawing percentile bands, and writing figures to files.
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+import os
+
+from typing import Tuple, Any, Optional
+
+import numpy
+
+from startup import LazyModule
+
+# plotly.graph_objects, imported when the first trace is made
+go = LazyModule('plotly.graph_objects')
+
+# The number of points above which a trace is drawn with WebGL
+SCATTERGL_THRESHOLD = 2000
+
+# The maximum number of points of a downsampled trace
+MAX_POINTS = 5000
+
+
+def downsample_minmax(x: Any, y: Any, max_points: int = MAX_POINTS) -> \
+        Tuple[numpy.ndarray, numpy.ndarray]:
+    """Return at most max_points points of (x, y), keeping the points with the lowest
+    and highest y in each of max_points // 2 buckets of consecutive x.
+
+    This keeps the spread of scattered data such as every temperature reading of a
+    province. The returned points are sorted by x.
+
+    >>> downsample_minmax([0, 1, 2, 3, 4, 5], [5, 1, 9, 2, 3, 4], 4)
+    (array([1, 2, 3, 5]), array([1, 9, 2, 4]))
+    """
+    x = numpy.asarray(x)
+    y = numpy.asarray(y)
+    if len(x) <= max_points:
+        return (x, y)
+
+    order = numpy.argsort(x, kind='stable')
+    n_buckets = max(max_points // 2, 1)
+    bucket = numpy.arange(len(x)) * n_buckets // len(x)
+
+    # Sort by y within each bucket, so that its first and last points are its extremes
+    by_y = order[numpy.lexsort((y[order], bucket))]
+    starts = numpy.flatnonzero(numpy.r_[True, bucket[1:] != bucket[:-1]])
+    ends = numpy.r_[starts[1:], len(x)] - 1
+    keep = numpy.unique(numpy.concatenate((by_y[starts], by_y[ends])))
+    keep = keep[numpy.argsort(x[keep], kind='stable')]
+
+    return (x[keep], y[keep])
+
+
+def downsample_lttb(x: Any, y: Any, max_points: int = MAX_POINTS) -> \
+        Tuple[numpy.ndarray, numpy.ndarray]:
+    """Return max_points points of (x, y) chosen by the Largest-Triangle-Three-Buckets
+    algorithm, which keeps the visual shape of a line.
+
+    Preconditions:
+        - x is sorted in non-decreasing order
+    """
+    x = numpy.asarray(x, dtype=numpy.float64)
+    y = numpy.asarray(y, dtype=numpy.float64)
+    n = len(x)
+    if n <= max_points or max_points < 3:
+        return (x, y)
+
+    # The first and last points are always kept; the others are split into buckets
+    edges = numpy.linspace(1, n - 1, max_points - 1).astype(numpy.intp)
+    selected = numpy.empty(max_points, dtype=numpy.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = numpy.abs((x[previous] - next_x) * (y[start:end] - y[previous]) -
+                         (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(numpy.argmax(area))
+        selected[i + 1] = previous
+
+    return (x[selected], y[selected])
+
+
+def make_trace(x: Any, y: Any, mode: str = 'lines', name: Optional[str] = None,
+               downsample: Optional[str] = 'lttb', max_points: int = MAX_POINTS) -> Any:
+    """Return a Plotly scatter trace of (x, y), downsampled with the given method
+    ('lttb', 'minmax', or None for no downsampling) if it has more than max_points
+    points, and drawn with WebGL if it still has more than SCATTERGL_THRESHOLD points.
+    """
+    if downsample == 'lttb':
+        x, y = downsample_lttb(x, y, max_points)
+    elif downsample == 'minmax':
+        x, y = downsample_minmax(x, y, max_points)
+
+    trace_type = go.Scattergl if len(x) > SCATTERGL_THRESHOLD else go.Scatter
+    return trace_type(x=x, y=y, mode=mode, name=name)
+
+
+def band_traces(x: Any, lower: Any, upper: Any, name: str) -> Tuple[Any, Any]:
+    """Return the two traces of a shaded band between lower and upper."""
+    colour = 'rgba(100, 100, 100, 0.25)'
+    return (
+        go.Scatter(x=x, y=lower, mode='lines', line={'width': 0}, showlegend=False,
+                   hoverinfo='skip'),
+        go.Scatter(x=x, y=upper, mode='lines', line={'width': 0}, fill='tonexty',
+                   fillcolor=colour, name=name)
+    )
+
+
+def output_figure(fig: Any, output: Optional[str] = None) -> None:
+    """Show fig, or write it to the file output if it is not None.
+
+    A file ending in .html is written as a standalone page; any other extension
+    (e.g. .png or .svg) is written as a static image, which requires the kaleido package.
+    """
+    if output is None:
+        fig.show()
+    elif os.path.splitext(output)[1].lower() in {'.html', '.htm'}:
+        fig.write_html(output)
+    else:
+        fig.write_image(output)
+
+
+if __name__ == '__main__':
+    import python_ta.contracts
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
@@ -14,13 +14,35 @@ Copyright Information
 This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
 """
 import csv
+import hashlib
+import io
+import itertools
+import json
+import os
 import statistics
+import time
+import warnings
+import zipfile
 
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, BinaryIO, Collection, Iterator, Optional, Sequence, \
+    Iterable, TextIO, Union
 
 import numpy
-from scipy.optimize import curve_fit
+
+from instrument import stage
+from models import LOG_MODEL, RECIPROCAL_MODEL, LINEAR_MODEL
+from startup import LazyModule
+
+# scipy.optimize, imported when the first curve is fitted
+optimize = LazyModule('scipy.optimize')
+
+# The province codes used by the raw temperature data
+PROVINCES = {'AB', 'BC', 'MB', 'NB', 'NL', 'NT', 'NS', 'NU', 'ON', 'PE', 'QC', 'SK', 'YT'}
+
+# The months whose temperatures are analysed by default
+ANALYSIS_MONTHS = (8, 9)
 
 
 @dataclass
@@ -35,7 +57,7 @@ class Temperature:
 
     Representation Invariants:
         - self.prov in {'AB', 'BC', 'MB', 'NB', 'NL', 'NT', 'NS', 'NU', 'ON', 'PE', 'QC', 'SK', 'YT'}
-        - self.year in range(1990, 2020)
+        - self.year in range(0, 10000)
         - self.month in range(1, 13)
     """
     prov: str
@@ -44,37 +66,841 @@ class Temperature:
     temp: float
 
 
-def read_csv_temp(filename: str) -> List[Temperature]:
-    """Return the temperature data stored in the csv file with the given filename."""
+@dataclass
+class TemperatureTable:
+    """A columnar collection of temperature points, where the i-th entry of
+    every array describes the same record.
+
+    Instance Attributes:
+        - prov: the province in which each temperature is recorded
+        - station: the id of the station that recorded each temperature
+        - year: the year in which each temperature is recorded
+        - month: the month in which each temperature is recorded
+        - temp: mean temperature in degrees Celsius, NaN if missing
+        - temp_max: maximum temperature in degrees Celsius, NaN if missing
+        - temp_min: minimum temperature in degrees Celsius, NaN if missing
+        - lat: latitude of the station that recorded each temperature
+        - lon: longitude of the station that recorded each temperature
+        - precip: total precipitation in mm, NaN if missing
+        - rain: total rainfall in mm, NaN if missing
+        - snow: total snowfall in mm, NaN if missing
+        - pressure_sea_level: mean sea level pressure in hPa, NaN if missing
+        - pressure_station: mean station pressure in hPa, NaN if missing
+        - wind_speed: mean wind speed in km/h, NaN if missing
+
+    Representation Invariants:
+        - all(len(column) == len(self.prov) for column in self.columns().values())
+        - all(p in PROVINCES for p in self.prov)
+        - all(m in range(1, 13) for m in self.month)
+
+    Sample usage:
+    >>> table = read_temperature_table('temperature/yukon.csv')
+    >>> august = table.filter(months={8}).drop_missing()
+    >>> august[0].month
+    8
+    >>> [record.month for record in august[1:3]]
+    [8, 8]
+    """
+    prov: numpy.ndarray
+    year: numpy.ndarray
+    month: numpy.ndarray
+    temp: numpy.ndarray
+    station: Optional[numpy.ndarray] = None
+    temp_max: Optional[numpy.ndarray] = None
+    temp_min: Optional[numpy.ndarray] = None
+    lat: Optional[numpy.ndarray] = None
+    lon: Optional[numpy.ndarray] = None
+    precip: Optional[numpy.ndarray] = None
+    rain: Optional[numpy.ndarray] = None
+    snow: Optional[numpy.ndarray] = None
+    pressure_sea_level: Optional[numpy.ndarray] = None
+    pressure_station: Optional[numpy.ndarray] = None
+    wind_speed: Optional[numpy.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.prov)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Temperature, 'TemperatureTable']:
+        """Return the record at the given index as a Temperature, or the records in the
+        given slice as a new table, like a list of Temperature.
+
+        Raise TypeError if index is neither an integer nor a slice.
+        """
+        if isinstance(index, slice):
+            return self.select(index)
+        if isinstance(index, bool) or not isinstance(index, (int, numpy.integer)):
+            raise TypeError(f'TemperatureTable indices must be integers or slices, not '
+                            f'{type(index).__name__}; use select() for masks and index '
+                            f'arrays, or to_records() for a list')
+        return Temperature(str(self.prov[index]), int(self.year[index]),
+                           int(self.month[index]), float(self.temp[index]))
+
+    def __iter__(self) -> Iterator[Temperature]:
+        return iter(self.to_records())
+
+    def columns(self) -> Dict[str, numpy.ndarray]:
+        """Return a mapping of column name to array for every column that is loaded."""
+        return {name: getattr(self, name) for name in TABLE_COLUMNS
+                if getattr(self, name) is not None}
+
+    def missing(self, name: str) -> numpy.ndarray:
+        """Return the mask of the records whose value in the column with the given name
+        is missing.
+
+        Raise ValueError if the column is not loaded in this table.
+        """
+        column = getattr(self, name)
+        if column is None:
+            raise ValueError(f'column {name!r} is not loaded in the table')
+        if column.dtype.kind == 'f':
+            return numpy.isnan(column)
+        if column.dtype.kind == 'U':
+            return column == ''
+        return numpy.zeros(len(column), dtype=bool)
+
+    def select(self, mask: numpy.ndarray) -> 'TemperatureTable':
+        """Return a new table containing the records selected by the given
+        boolean mask or index array.
+        """
+        return TemperatureTable(**{name: column[mask]
+                                   for name, column in self.columns().items()})
+
+    def filter(self, months: Optional[Collection[int]] = None,
+               years: Optional[Collection[int]] = None,
+               provinces: Optional[Collection[str]] = None) -> 'TemperatureTable':
+        """Return a new table containing only the records whose month, year and
+        province are in the given collections. A collection of None means no
+        restriction on that column.
+        """
+        mask = numpy.ones(len(self), dtype=bool)
+        if months is not None:
+            mask &= numpy.isin(self.month, list(months))
+        if years is not None:
+            mask &= numpy.isin(self.year, list(years))
+        if provinces is not None:
+            mask &= numpy.isin(self.prov, list(provinces))
+        return self.select(mask)
+
+    def drop_missing(self) -> 'TemperatureTable':
+        """Return a new table without the records whose mean temperature is missing."""
+        return self.select(~numpy.isnan(self.temp))
+
+    def to_records(self) -> List[Temperature]:
+        """Return the records of this table as a list of Temperature objects."""
+        return [Temperature(p, y, m, t) for p, y, m, t in
+                zip(self.prov.tolist(), self.year.tolist(),
+                    self.month.tolist(), self.temp.tolist())]
+
+    @staticmethod
+    def from_records(records: Sequence[Temperature]) -> 'TemperatureTable':
+        """Return a table containing the given Temperature objects, in order."""
+        return TemperatureTable(
+            prov=numpy.array([t.prov for t in records], dtype='<U2'),
+            year=numpy.array([t.year for t in records], dtype=numpy.int32),
+            month=numpy.array([t.month for t in records], dtype=numpy.int8),
+            temp=numpy.array([t.temp for t in records], dtype=numpy.float64)
+        )
+
+    @staticmethod
+    def concatenate(tables: Sequence['TemperatureTable']) -> 'TemperatureTable':
+        """Return a single table containing the records of all the given tables, in order.
+
+        Only the columns loaded in every table are kept.
+
+        Preconditions:
+            - len(tables) > 0
+        """
+        names = [name for name in TABLE_COLUMNS
+                 if all(getattr(t, name) is not None for t in tables)]
+        return TemperatureTable(**{name: numpy.concatenate([getattr(t, name) for t in tables])
+                                   for name in names})
+
+
+@dataclass
+class RejectedRow:
+    """A row of raw temperature data that could not be decoded.
+
+    Instance Attributes:
+        - line: the line number of the row in its file, where the header is line 1
+        - reason: why the row was rejected
+    """
+    line: int
+    reason: str
+
+
+# The type of each column of a TemperatureTable, in order
+COLUMN_TYPES = {
+    'prov': numpy.dtype('<U2'),
+    'year': numpy.dtype(numpy.int32),
+    'month': numpy.dtype(numpy.int8),
+    'temp': numpy.dtype(numpy.float64),
+    'station': numpy.dtype(str),
+    'temp_max': numpy.dtype(numpy.float64),
+    'temp_min': numpy.dtype(numpy.float64),
+    'lat': numpy.dtype(numpy.float64),
+    'lon': numpy.dtype(numpy.float64),
+    'precip': numpy.dtype(numpy.float64),
+    'rain': numpy.dtype(numpy.float64),
+    'snow': numpy.dtype(numpy.float64),
+    'pressure_sea_level': numpy.dtype(numpy.float64),
+    'pressure_station': numpy.dtype(numpy.float64),
+    'wind_speed': numpy.dtype(numpy.float64)
+}
+
+# The columns of a TemperatureTable, in order
+TABLE_COLUMNS = tuple(COLUMN_TYPES)
+
+# The columns of a TemperatureTable that are only decoded when asked for
+OPTIONAL_COLUMNS = TABLE_COLUMNS[4:]
+
+# The value used by the raw data to mark a missing measurement
+MISSING_VALUE = -9999.9
+
+
+# The header of the raw data column from which each column of a TemperatureTable is decoded
+HEADER_NAMES = {
+    'prov': 'province__province',
+    'year': 'date',
+    'month': 'date',
+    'temp': 'temp_mean__temp_moyenne',
+    'station': 'station_id__id_station',
+    'temp_max': 'temp_max__temp_max',
+    'temp_min': 'temp_min__temp_min',
+    'lat': 'lat__lat',
+    'lon': 'lon__long',
+    'precip': 'total_precip__precip_totale',
+    'rain': 'rain__pluie',
+    'snow': 'snow__neige',
+    'pressure_sea_level': 'pressure_sea_level__pression_niveau_mer',
+    'pressure_station': 'pressure_station__pression_station',
+    'wind_speed': 'wind_speed__vitesse_vent'
+}
+
+# The number of records in each batch yielded by iter_temperature_batches by default
+BATCH_SIZE = 65536
+
+
+def read_temperature_table(filename: str, rejected: Optional[List[RejectedRow]] = None,
+                           columns: Collection[str] = (),
+                           length: Optional[int] = None) -> TemperatureTable:
+    """Return every temperature record stored in the csv file with the given filename,
+    as a TemperatureTable with the prov, year, month and temp columns and the optional
+    columns named in columns.
+
+    If length is not None, only the first length bytes of the file are read, so that
+    rows appended after the size of the file was recorded are left for later.
+
+    Malformed rows are skipped and appended to rejected, or reported in a warning if
+    rejected is None.
+
+    Preconditions:
+        - all(name in OPTIONAL_COLUMNS for name in columns)
+        - length is None or length is the position just after a line break of the file
+    """
+    with stage('read_csv_temp', file=filename) as info:
+        skipped = [] if rejected is None else rejected
+        start = len(skipped)
+        with open(filename, 'rb') as file:
+            table = scan_temperature_table(_text_lines(file, length), extra_columns=columns,
+                                           drop_missing=False, rejected=skipped)
+        info['rows'] = len(table)
+        info['rejected'] = len(skipped) - start
+        info['bytes'] = os.path.getsize(filename) if length is None else length
+    if rejected is None:
+        _warn_rejected(filename, skipped)
+    return table
+
+
+def read_appended_temperature(filename: str, offset: int, columns: Collection[str] = (),
+                              length: Optional[int] = None) -> TemperatureTable:
+    """Return every temperature record stored after the first offset bytes of the csv
+    file with the given filename, e.g. the rows appended since the file was last read,
+    with the same columns as read_temperature_table.
+
+    If length is not None, the bytes of the file after its first length bytes are not
+    read, like in read_temperature_table.
+
+    Malformed rows are skipped and reported in a warning, with their line numbers in the
+    whole file.
+
+    Preconditions:
+        - offset is 0 or the position just after a line break of the file
+        - length is None or length is the position just after a line break of the file
+    """
+    rejected = []
+    with open(filename, 'rb') as file:
+        header = file.readline().decode('utf-8')
+        start = max(offset, file.tell())
+        file.seek(start)
+        table = scan_temperature_table(itertools.chain([header], _text_lines(file, length)),
+                                       extra_columns=columns, drop_missing=False,
+                                       rejected=rejected)
+    if rejected:
+        # The rows were numbered as if the first one after offset followed the header
+        skipped = _count_lines(filename, start) - 1
+        rejected = [RejectedRow(row.line + skipped, row.reason) for row in rejected]
+    _warn_rejected(filename, rejected)
+    return table
+
+
+class _BoundedReader(io.RawIOBase):
+    """A binary stream of the bytes of a file from its current position, which ends
+    after a given number of bytes.
+
+    Instance Attributes:
+        - file: the binary file read
+        - remaining: the number of bytes left to read from file
+    """
+    file: BinaryIO
+    remaining: int
+
+    def __init__(self, file: BinaryIO, remaining: int) -> None:
+        super().__init__()
+        self.file = file
+        self.remaining = remaining
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        """Read at most len(buffer) of the remaining bytes into buffer, and return the
+        number of bytes read.
+        """
+        if self.remaining <= 0:
+            return 0
+        count = self.file.readinto(memoryview(buffer)[:self.remaining])
+        self.remaining -= count
+        return count
+
+
+def _text_lines(file: BinaryIO, length: Optional[int]) -> TextIO:
+    """Return the text of the csv file open in binary mode from its current position to
+    its end, or to the end of its first length bytes if length is not None.
+    """
+    if length is not None:
+        file = io.BufferedReader(_BoundedReader(file, length - file.tell()))
+    return io.TextIOWrapper(file, encoding='utf-8', newline='')
+
+
+def _count_lines(filename: str, length: int) -> int:
+    """Return the number of line breaks in the first length bytes of the file with the
+    given filename.
+    """
+    count = 0
+    with open(filename, 'rb') as file:
+        while length > 0:
+            block = file.read(min(1 << 20, length))
+            if not block:
+                break
+            count += block.count(b'\n')
+            length -= len(block)
+    return count
+
+
+def _warn_rejected(filename: str, rejected: List[RejectedRow]) -> None:
+    """Warn that the given rows of the file with the given filename were skipped."""
+    if rejected:
+        first = min(rejected, key=lambda r: r.line)
+        warnings.warn(f'skipped {len(rejected)} malformed rows of {filename}, '
+                      f'the first at line {first.line}: {first.reason}')
+
+
+def scan_temperature_table(source: Union[str, Iterable[str]],
+                           months: Optional[Collection[int]] = None,
+                           years: Optional[Collection[int]] = None,
+                           provinces: Optional[Collection[str]] = None,
+                           extra_columns: Collection[str] = (),
+                           drop_missing: bool = True,
+                           rejected: Optional[List[RejectedRow]] = None) -> TemperatureTable:
+    """Return the temperature records of source that satisfy the given filters,
+    as a single TemperatureTable.
+
+    The arguments are the same as the ones of iter_temperature_batches. Only the
+    selected records are ever held in memory, so this is suitable for large files
+    when the filters are selective.
+    """
+    batches = list(iter_temperature_batches(source, months, years, provinces,
+                                            extra_columns, drop_missing, rejected=rejected))
+    if not batches:
+        names = ('prov', 'date', 'temp', *extra_columns)
+        return _build_batch({name: [] for name in names}, [])
+    return TemperatureTable.concatenate(batches)
+
+
+def iter_temperature_batches(source: Union[str, Iterable[str]],
+                             months: Optional[Collection[int]] = None,
+                             years: Optional[Collection[int]] = None,
+                             provinces: Optional[Collection[str]] = None,
+                             extra_columns: Collection[str] = (),
+                             drop_missing: bool = True,
+                             batch_size: int = BATCH_SIZE,
+                             rejected: Optional[List[RejectedRow]] = None) \
+        -> Iterator[TemperatureTable]:
+    """Yield the temperature records of source in TemperatureTables of at most
+    batch_size records each.
+
+    source is either the filename of a csv file, or an open text stream or any other
+    iterable of its lines. Columns are found by their header name, and rows are discarded
+    as soon as their month, year or province is not in the given collections (None means
+    no restriction), or when their mean temperature is missing and drop_missing is True.
+    Only the prov, year, month and temp columns are decoded, plus the optional columns
+    named in extra_columns.
+
+    A row is malformed if it has too few fields, its province is not in PROVINCES, its
+    date is not in the format YYYY-MM or YYYY-MM-DD, or a decoded measurement is not a
+    number. Malformed rows are skipped and appended to rejected, or, if rejected is None,
+    the first one raises a ValueError.
+
+    Raise ValueError if a needed column is not in the header of source.
+
+    Preconditions:
+        - all(name in OPTIONAL_COLUMNS for name in extra_columns)
+        - batch_size > 0
+    """
+    if isinstance(source, str):
+        with open(source, encoding='utf-8', newline='') as file:
+            yield from iter_temperature_batches(file, months, years, provinces, extra_columns,
+                                                drop_missing, batch_size, rejected)
+        return
+
+    reader = csv.reader(source)
+    header = [name.lstrip('\ufeff') for name in next(reader, [])]
+    if not header:
+        return
+
+    names = ('prov', 'date', 'temp', *extra_columns)
+    indices = []
+    for name in names:
+        header_name = HEADER_NAMES.get(name, name)
+        if header_name not in header:
+            raise ValueError(f'column {header_name!r} is missing from the header')
+        indices.append(header.index(header_name))
+    i_prov, i_date, i_temp = indices[:3]
+    width = max(indices) + 1
+
+    month_keys = None if months is None else {f'{m:02d}' for m in months}
+    year_keys = None if years is None else {str(y) for y in years}
+    prov_keys = None if provinces is None else set(provinces)
+    missing_keys = {'', str(MISSING_VALUE)} if drop_missing else set()
+
+    buffer = {name: [] for name in names}
+    appenders = [(buffer[name].append, i) for name, i in zip(names, indices)]
+    lines = []
+    size = 0
+
+    for row in reader:
+        if len(row) < width:
+            if row:
+                _reject(rejected, RejectedRow(
+                    reader.line_num, f'expected at least {width} fields, got {len(row)}'))
+            continue
+        date = row[i_date]
+        if month_keys is not None and date[5:7] not in month_keys:
+            continue
+        if year_keys is not None and date[:4] not in year_keys:
+            continue
+        if prov_keys is not None and row[i_prov] not in prov_keys:
+            continue
+        if row[i_temp] in missing_keys:
+            continue
+
+        for append, i in appenders:
+            append(row[i])
+        lines.append(reader.line_num)
+        size += 1
+
+        if size == batch_size:
+            yield _build_batch(buffer, lines, drop_missing, rejected)
+            for column in buffer.values():
+                column.clear()
+            lines.clear()
+            size = 0
+
+    if size > 0:
+        yield _build_batch(buffer, lines, drop_missing, rejected)
+
+
+def _reject(rejected: Optional[List[RejectedRow]], row: RejectedRow) -> None:
+    """Append row to rejected, or raise a ValueError describing row if rejected is None."""
+    if rejected is None:
+        raise ValueError(f'line {row.line}: {row.reason}')
+    rejected.append(row)
+
+
+def _build_batch(buffer: Dict[str, List[str]], lines: List[int], drop_missing: bool = False,
+                 rejected: Optional[List[RejectedRow]] = None) -> TemperatureTable:
+    """Return the TemperatureTable decoded from the raw values in buffer, which maps
+    'prov', 'date', 'temp' and any optional column name to a list of raw values, where
+    lines is the line number of each row.
+
+    The rows that are malformed are left out and passed to _reject.
+    """
+    year, month, bad_date = _decode_dates(buffer['date'])
+    prov = numpy.array(buffer['prov'], dtype='<U3')
+    reasons = [
+        ('malformed date', bad_date),
+        ('unknown province', ~numpy.isin(prov, sorted(PROVINCES)))
+    ]
+
+    columns = {'prov': prov.astype(COLUMN_TYPES['prov']), 'year': year, 'month': month}
+    for name in TABLE_COLUMNS[3:]:
+        if name not in buffer:
+            continue
+        if COLUMN_TYPES[name].kind == 'f':
+            columns[name], bad = _decode_float_column(buffer[name])
+            reasons.append((f'{name} is not a number', bad))
+        else:
+            columns[name] = numpy.array(buffer[name], dtype=COLUMN_TYPES[name])
+
+    table = TemperatureTable(**columns)
+    bad_rows = numpy.zeros(len(lines), dtype=bool)
+    batch_rejected = []
+    for reason, bad in reasons:
+        batch_rejected.extend(RejectedRow(lines[i], reason)
+                              for i in numpy.flatnonzero(bad & ~bad_rows))
+        bad_rows |= bad
+    if bad_rows.any():
+        for row in sorted(batch_rejected, key=lambda r: r.line):
+            _reject(rejected, row)
+        table = table.select(~bad_rows)
+
+    if drop_missing:
+        return table.drop_missing()
+    return table
+
+
+def _decode_dates(dates: List[str]) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """Return the year and month of each date in the format YYYY-MM or YYYY-MM-DD,
+    computed from the characters of all the dates at once, and the mask of the dates
+    that are malformed.
+
+    >>> year, month, bad = _decode_dates(['1995-08', '2021-01-31', '1995-8'])
+    >>> year[:2].tolist(), month[:2].tolist(), bad.tolist()
+    ([1995, 2021], [8, 1], [False, False, True])
+    """
+    # One more character than the longest format, so that longer dates are not truncated
+    chars = numpy.array(dates, dtype='<U11').view(numpy.uint32).reshape(-1, 11) \
+        .astype(numpy.int32)
+    digits = chars[:, [0, 1, 2, 3, 5, 6]] - ord('0')
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 4] * 10 + digits[:, 5]
+
+    day_digits = chars[:, [8, 9]] - ord('0')
+    day = day_digits[:, 0] * 10 + day_digits[:, 1]
+    no_day = (chars[:, 7:] == 0).all(axis=1)
+    with_day = (chars[:, 7] == ord('-')) & ((day_digits >= 0) & (day_digits <= 9)).all(axis=1) \
+        & (day >= 1) & (day <= 31) & (chars[:, 10] == 0)
+
+    bad = ((digits < 0) | (digits > 9)).any(axis=1) | (chars[:, 4] != ord('-')) | \
+        ~(no_day | with_day) | (month < 1) | (month > 12)
+    return (year.astype(numpy.int32), month.astype(numpy.int8), bad)
+
+
+def _decode_float_column(values: List[str]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Convert a list of raw measurements to a float array, where empty strings and
+    MISSING_VALUE become NaN, and return it with the mask of the values that are not
+    numbers.
+    """
+    bad = numpy.zeros(len(values), dtype=bool)
+    try:
+        if '' in values:
+            values = ['nan' if v == '' else v for v in values]
+        column = numpy.array(values, dtype=numpy.float64)
+    except ValueError:
+        column = numpy.full(len(values), numpy.nan)
+        for i, value in enumerate(values):
+            try:
+                column[i] = float(value)
+            except ValueError:
+                bad[i] = True
+    column[column == MISSING_VALUE] = numpy.nan
+    return (column, bad)
+
+
+# The directory in which parsed temperature tables are cached
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+# The layout of the cache entries; entries written with another layout are rebuilt
+CACHE_VERSION = 4
+
+# The name of the file of the cache directory in which fit_model stores its fits
+FIT_STORE = 'fits.json'
+
+# The errors raised when reading a truncated, corrupt or otherwise unreadable cache entry
+_CACHE_ERRORS = (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile)
+
+
+def load_temperature_table(filename: str, cache_dir: Optional[str] = CACHE_DIR,
+                           columns: Collection[str] = (),
+                           length: Optional[int] = None) -> TemperatureTable:
+    """Return every temperature record stored in the csv file with the given filename,
+    or in its first length bytes if length is not None, with at least the columns read
+    by read_temperature_table for the given optional columns, reusing the cached copy
+    in cache_dir if the file has not changed since it was cached.
+
+    A cache entry is reused if the size and modification time of the file match; otherwise
+    the content hash of the file decides. An entry lacking some of the given columns is
+    rebuilt with both its columns and the given ones, so every optional column is only
+    decoded once it is asked for. If cache_dir is None, the cache is not used.
+
+    Preconditions:
+        - all(name in OPTIONAL_COLUMNS for name in columns)
+        - length is None or length is the position just after a line break of the file
+    """
+    with stage('load_temperature', file=filename) as info:
+        table, info['cache'] = _load_temperature_table(filename, cache_dir, columns, length)
+        info['rows'] = len(table)
+    return table
 
-    with open(filename, encoding='utf-8') as file:
-        reader = csv.reader(file)
-        next(reader)  # skips the headers line
-        data = [process_row_temp(row) for row in reader]
 
-    # Change this line if we want another month(s)
-    return [item for item in data if item.temp != -9999.9 and item.month in {8, 9}]
+def _load_temperature_table(filename: str, cache_dir: Optional[str],
+                            columns: Collection[str] = (),
+                            length: Optional[int] = None) -> Tuple[TemperatureTable, str]:
+    """Return the table loaded by load_temperature_table, and whether the cache was a
+    'hit', a 'miss', or 'disabled'.
+    """
+    if cache_dir is None:
+        return (read_temperature_table(filename, columns=columns, length=length), 'disabled')
+
+    cache_path = cache_path_for(filename, cache_dir)
+    stat = os.stat(filename)
+    if length is None:
+        length = stat.st_size
+    digest = None
+    columns = set(columns)
+
+    if os.path.exists(cache_path):
+        try:
+            with numpy.load(cache_path, allow_pickle=False) as cached:
+                if _cache_version(cached) == CACHE_VERSION:
+                    cached_columns = {name for name in OPTIONAL_COLUMNS if name in cached.files}
+                    if columns <= cached_columns:
+                        if int(cached['_size']) == length == stat.st_size and \
+                                int(cached['_mtime_ns']) == stat.st_mtime_ns:
+                            return (_table_from_cache(cached), 'hit')
+                        digest = file_digest(filename, length)
+                        if int(cached['_size']) == length and str(cached['_sha256']) == digest:
+                            table = _table_from_cache(cached)
+                            _save_cache(cache_path, filename, table, length, stat, digest)
+                            return (table, 'hit')
+                    # The entry is rebuilt with the columns it already has as well
+                    columns |= cached_columns
+        except _CACHE_ERRORS:
+            # An entry that cannot be read is a miss, and is removed to be written again
+            _remove_entry(cache_path)
+
+    table = read_temperature_table(filename, columns=[name for name in OPTIONAL_COLUMNS
+                                                      if name in columns], length=length)
+    _save_cache(cache_path, filename, table, length, stat,
+                digest or file_digest(filename, length))
+    return (table, 'miss')
+
+
+def cache_path_for(filename: str, cache_dir: str = CACHE_DIR) -> str:
+    """Return the path of the cache entry of the csv file with the given filename."""
+    source = os.path.abspath(filename)
+    key = hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return os.path.join(cache_dir, f'{stem}-{key}.npz')
+
+
+def _remove_entry(cache_path: str) -> None:
+    """Remove the cache entry at cache_path, if it can be removed."""
+    try:
+        os.remove(cache_path)
+    except OSError:
+        pass
+
+
+def file_digest(filename: str, length: Optional[int] = None) -> str:
+    """Return the SHA-256 hex digest of the content of the file with the given filename,
+    or of its first length bytes if length is not None.
+    """
+    sha = hashlib.sha256()
+    remaining = numpy.inf if length is None else length
+    with open(filename, 'rb') as file:
+        while remaining > 0:
+            block = file.read(int(min(1 << 20, remaining)))
+            if not block:
+                break
+            sha.update(block)
+            remaining -= len(block)
+    return sha.hexdigest()
+
+
+def _cache_version(cached: Any) -> int:
+    """Return the layout version of an opened cache entry, or 1 for entries written
+    before the layout was versioned.
+    """
+    return int(cached['_version']) if '_version' in cached.files else 1
+
+
+def _table_from_cache(cached: Any) -> TemperatureTable:
+    """Return the TemperatureTable stored in an opened cache entry."""
+    return TemperatureTable(**{name: cached[name] for name in TABLE_COLUMNS
+                               if name in cached.files})
+
+
+def _save_cache(cache_path: str, filename: str, table: TemperatureTable, length: int,
+                stat: os.stat_result, digest: str) -> None:
+    """Write table, read from the first length bytes of the file with the given filename,
+    to cache_path along with the metadata of the file.
+
+    The entry is written to a temporary file first so that readers never see a
+    partially written entry. Failing to write the cache is not an error.
+    """
+    temp_path = cache_path + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        with open(temp_path, 'wb') as file:
+            numpy.savez(file, _version=CACHE_VERSION, _source=os.path.abspath(filename),
+                        _size=length, _mtime_ns=stat.st_mtime_ns, _sha256=digest,
+                        **table.columns())
+        os.replace(temp_path, cache_path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def cache_entries(cache_dir: str = CACHE_DIR) -> List[Dict[str, Any]]:
+    """Return a description of every entry in cache_dir, including whether its
+    source file has changed since it was cached.
+
+    The fit store of fit_model is described as an entry whose source is FIT_STORE and
+    whose rows are the stored fits.
+    """
+    if not os.path.isdir(cache_dir):
+        return []
+
+    entries = []
+    for name in sorted(os.listdir(cache_dir)):
+        if not name.endswith('.npz') and name != FIT_STORE:
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            entries.append(_describe_entry(path) if name.endswith('.npz')
+                           else _describe_fit_store(path))
+        except _CACHE_ERRORS:
+            entries.append({'path': path, 'source': '', 'bytes': os.path.getsize(path),
+                            'rows': 0, 'sha256': '', 'status': 'corrupt'})
+
+    return entries
+
+
+def _describe_entry(path: str) -> Dict[str, Any]:
+    """Return the description of the cache entry at path used by cache_entries."""
+    with numpy.load(path, allow_pickle=False) as cached:
+        source = str(cached['_source'])
+        entry = {'path': path, 'source': source, 'bytes': os.path.getsize(path),
+                 'rows': len(cached['prov']), 'sha256': str(cached['_sha256'])}
+        if not os.path.exists(source):
+            entry['status'] = 'orphaned'
+        elif _cache_version(cached) != CACHE_VERSION:
+            entry['status'] = 'outdated'
+        elif os.stat(source).st_mtime_ns == int(cached['_mtime_ns']) and \
+                os.path.getsize(source) == int(cached['_size']):
+            entry['status'] = 'fresh'
+        else:
+            entry['status'] = 'stale'
+    return entry
+
+
+def _describe_fit_store(path: str) -> Dict[str, Any]:
+    """Return the description of the fit store at path used by cache_entries."""
+    with open(path, encoding='utf-8') as file:
+        stored = json.load(file)
+    if not isinstance(stored, dict) or not isinstance(stored.get('fits'), dict):
+        raise ValueError(f'{path} is not a fit store')
+    return {'path': path, 'source': FIT_STORE, 'bytes': os.path.getsize(path),
+            'rows': len(stored['fits']), 'sha256': '',
+            'status': 'fresh' if stored.get('version') == FIT_VERSION else 'outdated'}
+
+
+def purge_cache(cache_dir: str = CACHE_DIR) -> int:
+    """Remove every entry in cache_dir, including the fit store of fit_model, and return
+    the number of entries removed.
+    """
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    removed = 0
+    for name in os.listdir(cache_dir):
+        if name.endswith('.npz') or name.endswith('.tmp') or name == FIT_STORE:
+            os.remove(os.path.join(cache_dir, name))
+            removed += 1
+
+    return removed
+
+
+def load_provinces(paths: Sequence[str], workers: Optional[int] = None,
+                   cache_dir: Optional[str] = CACHE_DIR, columns: Collection[str] = (),
+                   lengths: Optional[Sequence[int]] = None) -> \
+        Tuple[Dict[str, TemperatureTable], Dict[str, float]]:
+    """Load every temperature file in paths with the given optional columns, concurrently
+    in a pool of worker processes. If lengths is not None, only the first lengths[i]
+    bytes of paths[i] are read, as in load_temperature_table.
+
+    Return a tuple of (mapping of path to its TemperatureTable, mapping of path to the
+    number of seconds spent loading it). The tables are sent back from the workers as
+    numpy arrays. If workers is None, one worker per CPU is used; if it is at most 1,
+    the files are loaded one after another in this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(paths))
+    if lengths is None:
+        lengths = [None] * len(paths)
+
+    if workers <= 1:
+        results = [_load_timed(path, cache_dir, columns, length)
+                   for path, length in zip(paths, lengths)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_load_timed, paths, [cache_dir] * len(paths),
+                                        [tuple(columns)] * len(paths), lengths))
+
+    tables = {path: table for path, (table, _) in zip(paths, results)}
+    timings = {path: seconds for path, (_, seconds) in zip(paths, results)}
+    return (tables, timings)
+
+
+def _load_timed(path: str, cache_dir: Optional[str], columns: Collection[str] = (),
+                length: Optional[int] = None) -> Tuple[TemperatureTable, float]:
+    """Return the table loaded from path and the number of seconds spent loading it."""
+    start = time.perf_counter()
+    table = load_temperature_table(path, cache_dir, columns, length)
+    return (table, time.perf_counter() - start)
+
+
+def read_csv_temp(filename: str) -> TemperatureTable:
+    """Return the temperature data stored in the csv file with the given filename.
+
+    The returned table can be used like a list of Temperature; call to_records()
+    for an actual list.
+    """
+    return load_temperature_table(filename).filter(months=ANALYSIS_MONTHS).drop_missing()
 
 
 def process_row_temp(row: List[str]) -> Temperature:
     """Convert a row of temperature data to Temperature object"""
 
-    if row[10] == '':
-        row[10] = '-9999.9'
-
     year, month = row[9].split('-')
 
     return Temperature(
         row[8],  # province
         int(year),  # year
         int(month),  # month
-        float(row[10])  # temperature
+        float(row[10]) if row[10] != '' else MISSING_VALUE  # temperature
     )
 
 
-def get_yearly_median_temp(data: List[Temperature]) -> Dict[int, float]:
+def get_yearly_median_temp(data: Union[TemperatureTable, List[Temperature]]) -> Dict[int, float]:
     """Returns a list of temperature containing the median for each year."""
 
+    if isinstance(data, TemperatureTable):
+        with stage('median', rows=len(data)):
+            return _yearly_median_table(data)
+
     temp_mapping = {temp_class.year: [] for temp_class in data}
 
     for t in data:
@@ -86,6 +912,24 @@ def get_yearly_median_temp(data: List[Temperature]) -> Dict[int, float]:
     return temp_mapping
 
 
+def _yearly_median_table(table: TemperatureTable) -> Dict[int, float]:
+    """Return the median temperature of each year in the given table, computed by
+    sorting the table once by (year, temperature).
+    """
+    if len(table) == 0:
+        return {}
+    order = numpy.lexsort((table.temp, table.year))
+    years = table.year[order]
+    temps = table.temp[order]
+
+    starts = numpy.flatnonzero(numpy.r_[True, years[1:] != years[:-1]])
+    counts = numpy.diff(numpy.r_[starts, len(years)])
+    upper = temps[starts + counts // 2]
+    lower = temps[starts + (counts - 1) // 2]
+
+    return dict(zip(years[starts].tolist(), ((lower + upper) / 2).tolist()))
+
+
 def read_csv_emission(filename: str) -> Dict[int, int]:
     """Return the greenhouse gas emission data stored in the csv file with the given filename."""
 
@@ -99,19 +943,17 @@ def read_csv_emission(filename: str) -> Dict[int, int]:
     return mapping_so_far
 
 
-def model_emission(data: Dict[int, int]) -> Tuple[float, float, float]:
+def model_emission(data: Dict[int, int], cache_dir: Optional[str] = CACHE_DIR,
+                   series: Optional[str] = None) -> Tuple[float, float, float]:
     """Return the a-, b-, and c-value of y = a(ln(x - b)) + c, the best-fit curve
     of emission data.
 
+    The fit is stored in cache_dir and warm-started from the latest fit of the named
+    series, as in fit_model.
+
     Return (a, b, c)
     """
-    x = list(data.keys())
-    y = list(data.values())
-
-    def func(x, a, b, c) -> Any:
-        return a * numpy.log(x - b) + c
-
-    a, b, c = curve_fit(func, xdata=x, ydata=y)[0]
+    a, b, c = fit_model('log', list(data.keys()), list(data.values()), cache_dir, series).params
 
     return (a, b, c)
 
@@ -145,24 +987,24 @@ def read_csv_deforestation_hydro(filename: str) -> Dict[int, int]:
     return mapping_so_far
 
 
-def model_deforestation(data: Dict[int, int]) -> Tuple[float, float, float]:
+def model_deforestation(data: Dict[int, int], cache_dir: Optional[str] = CACHE_DIR,
+                        series: Optional[str] = None) -> Tuple[float, float, float]:
     """Return the a-, b-, and c-value of y = a/(x-b) + c, the best-fit curve
     of emission data.
 
+    The fit is stored in cache_dir and warm-started from the latest fit of the named
+    series, as in fit_model.
+
     Return (a, b, c)
     """
-    x = list(data.keys())
-    y = list(data.values())
-
-    def func(x, a, b, c) -> Any:
-        return a / (x - b) + c
-
-    a, b, c = curve_fit(func, xdata=x, ydata=y)[0]
+    a, b, c = fit_model('reciprocal', list(data.keys()), list(data.values()), cache_dir,
+                        series).params
 
     return (a, b, c)
 
 
-def model_correlation(data: Tuple[List[float], List[int], List[int]]) -> \
+def model_correlation(data: Tuple[List[float], List[int], List[int]],
+                      cache_dir: Optional[str] = CACHE_DIR, series: Optional[str] = None) -> \
         Tuple[float, float, float, float, float]:
     """Return the a-, b-, c-, d-, and e-value of y = a(x1 - b) + c(x2 - d) + e, the prediction of
     temperature based on the given values of emission and deforestation.
@@ -173,19 +1015,253 @@ def model_correlation(data: Tuple[List[float], List[int], List[int]]) -> \
     Input is in the format of (list of temperature values, list of
     emission values, list of deforestation values).
 
+    The fit is stored in cache_dir and warm-started from the latest fit of the named
+    series, as in fit_model.
+
     Returns the tuple (a, b, c, d, e)
     """
     x = numpy.array([data[1], data[2]])  # Emission, deforestation
     y = numpy.array(data[0])  # Temperature
 
-    def func(x, a, b, c, d, e) -> Any:
-        return numpy.abs(a) * (x[0] - b) + numpy.abs(c) * (x[1] - d) + e
-
-    a, b, c, d, e = curve_fit(func, xdata=x, ydata=y)[0]
+    a, b, c, d, e = fit_model('linear', x, y, cache_dir, series).params
 
     return (a, b, c, d, e)
 
 
+@dataclass
+class FitResult:
+    """The best-fit parameters of a model for a data series.
+
+    Instance Attributes:
+        - model: the name of the model in FIT_MODELS
+        - params: the best-fit parameters of the model
+        - covariance: the estimated covariance of params
+        - key: the hash of the model and the data series it was fitted to
+    """
+    model: str
+    params: Tuple[float, ...]
+    covariance: numpy.ndarray
+    key: str
+
+
+def _log_jacobian(x: numpy.ndarray, a: float, b: float, c: float) -> numpy.ndarray:
+    """Return the partial derivatives of LOG_MODEL with respect to a, b and c."""
+    return numpy.column_stack([numpy.log(x - b), -a / (x - b), numpy.ones_like(x)])
+
+
+def _log_guess(x: numpy.ndarray, y: numpy.ndarray) -> Tuple[float, ...]:
+    """Return an initial guess for LOG_MODEL, fitting a and c exactly for b just below min(x)."""
+    b = x.min() - 1
+    a, c = numpy.polyfit(numpy.log(x - b), y, 1)
+    return (a, b, c)
+
+
+def _reciprocal_jacobian(x: numpy.ndarray, a: float, b: float, c: float) -> numpy.ndarray:
+    """Return the partial derivatives of RECIPROCAL_MODEL with respect to a, b and c."""
+    return numpy.column_stack([1 / (x - b), a / (x - b) ** 2, numpy.ones_like(x)])
+
+
+def _reciprocal_guess(x: numpy.ndarray, y: numpy.ndarray) -> Tuple[float, ...]:
+    """Return an initial guess for RECIPROCAL_MODEL, fitting a and c exactly for b just
+    below min(x).
+    """
+    b = x.min() - 1
+    a, c = numpy.polyfit(1 / (x - b), y, 1)
+    return (a, b, c)
+
+
+def _linear_jacobian(x: numpy.ndarray, a: float, b: float, c: float, d: float,
+                     e: float) -> numpy.ndarray:
+    """Return the partial derivatives of LINEAR_MODEL with respect to a, b, c, d and e."""
+    ones = numpy.ones(x.shape[1])
+    sign_a = -1.0 if a < 0 else 1.0
+    sign_c = -1.0 if c < 0 else 1.0
+    return numpy.column_stack([sign_a * (x[0] - b), -abs(a) * ones, sign_c * (x[1] - d),
+                               -abs(c) * ones, ones])
+
+
+def _linear_guess(x: numpy.ndarray, y: numpy.ndarray) -> Tuple[float, ...]:
+    """Return an initial guess for LINEAR_MODEL from the least squares fit whose
+    coefficients of x[0] and x[1] are not negative.
+    """
+    best = (numpy.inf, (0.0, 0.0, 0.0, 0.0, float(numpy.mean(y))))
+    for columns in ([0, 1], [0], [1]):
+        design = numpy.column_stack([x[i] for i in columns] + [numpy.ones(x.shape[1])])
+        solution = numpy.linalg.lstsq(design, y, rcond=None)[0]
+        if numpy.any(solution[:-1] < 0):
+            continue
+        coefficients = dict(zip(columns, solution))
+        guess = (coefficients.get(0, 0.0), 0.0, coefficients.get(1, 0.0), 0.0, solution[-1])
+        best = min(best, (_cost(LINEAR_MODEL.function, x, y, guess), guess))
+    return best[1]
+
+
+def _shift_bounds(x: numpy.ndarray, n: int) -> Tuple[List[float], List[float]]:
+    """Return the bounds of a model whose second parameter must stay below min(x)."""
+    lower = [-numpy.inf] * n
+    upper = [numpy.inf] * n
+    upper[1] = float(numpy.min(x)) - 1e-6
+    return (lower, upper)
+
+
+# The models that can be fitted, mapping each name to its function, jacobian,
+# initial guess, and bounds
+FIT_MODELS = {
+    'log': (LOG_MODEL.function, _log_jacobian, _log_guess, lambda x: _shift_bounds(x, 3)),
+    'reciprocal': (RECIPROCAL_MODEL.function, _reciprocal_jacobian, _reciprocal_guess,
+                   lambda x: _shift_bounds(x, 3)),
+    'linear': (LINEAR_MODEL.function, _linear_jacobian, _linear_guess,
+               lambda x: ([-numpy.inf] * 5, [numpy.inf] * 5))
+}
+
+# The version of the fitting procedure; fits stored by another version are computed again
+FIT_VERSION = 3
+
+# The fits computed by this process, by key
+_FITS = {}
+
+# The parameters of the latest fit of each named series, by 'model:series', used as the
+# initial guess of its next fit
+_LATEST_PARAMS = {}
+
+
+def fit_model(model: str, x: Any, y: Any, cache_dir: Optional[str] = CACHE_DIR,
+              series: Optional[str] = None) -> FitResult:
+    """Return the best fit of the model with the given name to the data series (x, y).
+
+    Fits are memoized by the hash of the model and data, both in this process and in
+    cache_dir (None disables the latter). If series is not None, it names the data
+    series, e.g. 'emission_curve', and a new fit starts from the parameters of the
+    latest fit of the same series, e.g. the fit before a year was appended to the data.
+    The fit falls back to an initial guess derived from the data if that start does not
+    converge to a better fit than the guess itself. If no fit is better than the initial
+    guess, e.g. because the guess is already the best fit, the guess is returned.
+
+    Raise RuntimeError if neither a fit nor the initial guess is finite.
+
+    Preconditions:
+        - model in FIT_MODELS
+    """
+    x = numpy.asarray(x, dtype=numpy.float64)
+    y = numpy.asarray(y, dtype=numpy.float64)
+    key = fit_key(model, x, y)
+
+    if key in _FITS:
+        return _FITS[key]
+
+    store = _read_fit_store(cache_dir)
+    if key in store['fits'] and store['fits'][key].get('version') == FIT_VERSION:
+        entry = store['fits'][key]
+        result = FitResult(model, tuple(entry['params']), numpy.array(entry['covariance']), key)
+    else:
+        warm_start = None
+        if series is not None:
+            warm_start = _LATEST_PARAMS.get(f'{model}:{series}',
+                                            store['latest'].get(f'{model}:{series}'))
+        result = _fit(model, x, y, key, warm_start)
+        store['fits'][key] = {'version': FIT_VERSION, 'model': model,
+                              'params': list(result.params),
+                              'covariance': result.covariance.tolist()}
+        if series is not None:
+            store['latest'][f'{model}:{series}'] = list(result.params)
+        _write_fit_store(cache_dir, store)
+
+    _FITS[key] = result
+    if series is not None:
+        _LATEST_PARAMS[f'{model}:{series}'] = result.params
+    return result
+
+
+def fit_key(model: str, x: numpy.ndarray, y: numpy.ndarray) -> str:
+    """Return the hash identifying a fit of the given model to (x, y) by the current
+    version of the fitting procedure.
+    """
+    sha = hashlib.sha256(f'{model}:{FIT_VERSION}'.encode('utf-8'))
+    for array in (x, y):
+        array = numpy.ascontiguousarray(array, dtype=numpy.float64)
+        sha.update(str(array.shape).encode('utf-8'))
+        sha.update(array.tobytes())
+    return sha.hexdigest()
+
+
+def _fit(model: str, x: numpy.ndarray, y: numpy.ndarray, key: str,
+         warm_start: Optional[Sequence[float]]) -> FitResult:
+    """Fit the given model to (x, y), trying warm_start first if it is not None."""
+    func, jacobian, guess, bounds = FIT_MODELS[model]
+    lower, upper = bounds(x)
+    initial = guess(x, y)
+    initial_cost = _cost(func, x, y, initial)
+
+    starts = [initial]
+    if warm_start is not None and all(lo <= p <= up for p, lo, up in
+                                      zip(warm_start, lower, upper)):
+        starts.insert(0, tuple(warm_start))
+
+    fallback_covariance = numpy.full((len(initial), len(initial)), numpy.inf)
+    for start in starts:
+        try:
+            with warnings.catch_warnings(), \
+                    stage('curve_fit', model=model, rows=len(y), warm=start is not initial):
+                # A covariance that cannot be estimated is returned as infinite
+                warnings.simplefilter('ignore', optimize.OptimizeWarning)
+                params, covariance = optimize.curve_fit(func, xdata=x, ydata=y, p0=start,
+                                                        jac=jacobian, bounds=(lower, upper))
+        except (RuntimeError, ValueError):
+            continue
+        if not numpy.all(numpy.isfinite(params)):
+            continue
+        if _cost(func, x, y, params) <= initial_cost:
+            return FitResult(model, tuple(float(p) for p in params), covariance, key)
+        fallback_covariance = covariance
+
+    # No fit is better than the initial guess, which may already be the best fit up to
+    # rounding, as for the analytic guess of the linear model
+    if numpy.all(numpy.isfinite(initial)) and numpy.isfinite(initial_cost):
+        return FitResult(model, tuple(float(p) for p in initial), fallback_covariance, key)
+    raise RuntimeError(f'the {model} model has no finite fit')
+
+
+def _cost(func: Any, x: numpy.ndarray, y: numpy.ndarray, params: Sequence[float]) -> float:
+    """Return the sum of squared residuals of func with the given parameters."""
+    with numpy.errstate(all='ignore'):
+        residuals = func(x, *params) - y
+    cost = float(numpy.sum(residuals ** 2))
+    return cost if numpy.isfinite(cost) else numpy.inf
+
+
+def _read_fit_store(cache_dir: Optional[str]) -> Dict[str, Any]:
+    """Return the fits stored in cache_dir by the current version of the fitting procedure."""
+    store = {'version': FIT_VERSION, 'fits': {}, 'latest': {}}
+    if cache_dir is None:
+        return store
+
+    try:
+        with open(os.path.join(cache_dir, FIT_STORE), encoding='utf-8') as file:
+            stored = json.load(file)
+    except (OSError, ValueError):
+        return store
+
+    # The fits and latest parameters of another version of the fitting procedure are ignored
+    if isinstance(stored, dict) and stored.get('version') == FIT_VERSION:
+        store.update(stored)
+    return store
+
+
+def _write_fit_store(cache_dir: Optional[str], store: Dict[str, Any]) -> None:
+    """Write the fits in store to cache_dir. Failing to write is not an error."""
+    if cache_dir is None:
+        return
+
+    path = os.path.join(cache_dir, FIT_STORE)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(store, file)
+        os.replace(path + '.tmp', path)
+    except OSError:
+        pass
+
+
 if __name__ == '__main__':
     import python_ta.contracts
     python_ta.contracts.DEBUG_CONTRACTS = False
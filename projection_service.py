@@ -0,0 +1,411 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module is a local HTTP service that answers requests for
+projections of the simulation game with JSON, without a display. The
+processed data and fitted curves are loaded once and kept in memory, the
+simulations run in a pool of worker processes, identical requests made at
+the same time are simulated once, and recent results are cached. Run this
+file to start the service:
+
+    python projection_service.py [--host HOST] [--port PORT]
+
+The service answers the following requests:
+
+    GET  /health    whether the service is running
+    GET  /curves    the fitted curves and defaults used by simulations
+    GET  /stats     the number of simulations run, cached and coalesced
+    POST /simulate  a JSON object of simulation parameters, e.g.
+                    {"years": 100, "runs": 1000, "seed": 0}
+    POST /batch     {"requests": [...]}, a list of such objects
+
+Every parameter of a simulation is optional: 'years', 'runs', 'seed',
+'start_temp', 'percentiles', and the overrides 'emission_curve',
+'deforestation_curve' and 'correlation'.
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import signal
+
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Tuple, Any, Optional
+
+from dataset import ClimateDataset
+from simulation import PERCENTILES, simulate
+
+# The address the service listens on by default
+HOST = '127.0.0.1'
+PORT = 8110
+
+# The number of results kept in the cache by default
+CACHE_SIZE = 128
+
+# The largest simulation a request may ask for, and the largest request body in bytes.
+# A simulation holds several float64 arrays of runs * (years + 1) values, so MAX_CELLS
+# keeps each one under a gigabyte of memory.
+MAX_YEARS = 1000
+MAX_RUNS = 100000
+MAX_CELLS = 10 ** 7
+MAX_BODY = 1 << 20
+
+# The temperature of the first year of a game, as in main.py
+START_TEMP = 14
+
+# The reason phrase of each status code used by the service
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    """An error answered to the client with the given status code.
+
+    Instance Attributes:
+        - status: the HTTP status code of the response
+        - message: the description of the error sent to the client
+    """
+    status: int
+    message: str
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass(frozen=True)
+class ProjectionRequest:
+    """The parameters of a projection. Equal requests always give equal projections.
+
+    Instance Attributes:
+        - years: the number of years simulated after START_YEAR
+        - runs: the number of simulated games
+        - seed: the seed of the random numbers of the simulation
+        - start_temp: temperature of the first year
+        - emission_curve: prediction curve of emission
+        - deforestation_curve: prediction curve of deforestation
+        - correlation: correlation between temperature and (emission and deforestation)
+        - percentiles: the percentiles of the projection of each year
+
+    Representation Invariants:
+        - 0 <= self.years <= MAX_YEARS
+        - 1 <= self.runs <= MAX_RUNS
+        - self.runs * (self.years + 1) <= MAX_CELLS
+        - math.isfinite(self.start_temp)
+        - all(0 <= p <= 100 for p in self.percentiles)
+    """
+    years: int
+    runs: int
+    seed: int
+    start_temp: float
+    emission_curve: Tuple[float, ...]
+    deforestation_curve: Tuple[float, ...]
+    correlation: Tuple[float, ...]
+    percentiles: Tuple[float, ...]
+
+    @staticmethod
+    def from_json(data: Any, defaults: Dict[str, Any]) -> 'ProjectionRequest':
+        """Return the request described by the JSON object data, where every missing
+        parameter takes its value in defaults.
+
+        Raise HTTPError if data is not a valid request.
+        """
+        if not isinstance(data, dict):
+            raise HTTPError(400, 'a simulation request must be a JSON object')
+        unknown = set(data) - set(defaults)
+        if unknown:
+            raise HTTPError(400, f'unknown parameters: {", ".join(sorted(unknown))}')
+
+        values = {**defaults, **data}
+        try:
+            request = ProjectionRequest(
+                years=_integer(values['years'], 0, MAX_YEARS, 'years'),
+                runs=_integer(values['runs'], 1, MAX_RUNS, 'runs'),
+                seed=_integer(values['seed'], 0, 2 ** 63 - 1, 'seed'),
+                start_temp=_number(values['start_temp'], 'start_temp'),
+                emission_curve=_floats(values['emission_curve'], 3, 'emission_curve'),
+                deforestation_curve=_floats(values['deforestation_curve'], 3,
+                                            'deforestation_curve'),
+                correlation=_floats(values['correlation'], 5, 'correlation'),
+                percentiles=tuple(_number(p, 'percentiles') for p in values['percentiles'])
+            )
+        except (TypeError, ValueError) as error:
+            raise HTTPError(400, str(error)) from error
+
+        if request.runs * (request.years + 1) > MAX_CELLS:
+            raise HTTPError(400, f'runs * (years + 1) must be at most {MAX_CELLS}')
+        if not all(0 <= p <= 100 for p in request.percentiles):
+            raise HTTPError(400, 'percentiles must be between 0 and 100')
+        return request
+
+
+class ProjectionService:
+    """The state of a running projection service.
+
+    Instance Attributes:
+        - dataset: the processed data the default curves come from
+        - defaults: the parameters of a simulation that a request does not give
+        - executor: the pool the simulations run in, whose workers must not be forked
+          from this process once it is serving, as they would inherit its connections
+        - cache_size: the number of results kept in the cache
+        - stats: the number of simulations 'run', requests answered from the cache
+          ('cached'), and requests that waited for an identical one ('coalesced')
+
+    Representation Invariants:
+        - len(self._cache) <= self.cache_size
+    """
+    dataset: ClimateDataset
+    defaults: Dict[str, Any]
+    executor: Executor
+    cache_size: int
+    stats: Dict[str, int]
+    # The latest results, from least to most recently used
+    _cache: OrderedDict
+    # The simulations that are running, by request
+    _pending: Dict[ProjectionRequest, asyncio.Future]
+
+    def __init__(self, dataset: ClimateDataset, executor: Executor,
+                 cache_size: int = CACHE_SIZE) -> None:
+        """Initialize the service, fitting the curves of dataset if they are not yet."""
+        self.dataset = dataset
+        self.executor = executor
+        self.cache_size = cache_size
+        self.defaults = {
+            'years': 100,
+            'runs': 1000,
+            'seed': 0,
+            'start_temp': START_TEMP,
+            'emission_curve': list(dataset.emission_curve),
+            'deforestation_curve': list(dataset.deforestation_rest_curve),
+            'correlation': list(dataset.final_correlation),
+            'percentiles': list(PERCENTILES)
+        }
+        self.stats = {'run': 0, 'cached': 0, 'coalesced': 0}
+        self._cache = OrderedDict()
+        self._pending = {}
+
+    async def project(self, request: ProjectionRequest) -> Dict[str, Any]:
+        """Return the projection of the given request.
+
+        The result comes from the cache if possible, or from the simulation of an
+        identical request that is already running; otherwise the simulation runs in
+        the executor.
+        """
+        if request in self._cache:
+            self._cache.move_to_end(request)
+            self.stats['cached'] += 1
+            return self._cache[request]
+
+        if request in self._pending:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(self._pending[request])
+
+        future = asyncio.get_running_loop().run_in_executor(self.executor, run_projection,
+                                                            request)
+        self._pending[request] = future
+        self.stats['run'] += 1
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            del self._pending[request]
+
+        self._cache[request] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    async def handle(self, method: str, path: str, body: bytes) -> Any:
+        """Return the JSON response to the request with the given method, path and body.
+
+        Raise HTTPError if the request cannot be answered.
+        """
+        routes = {'/health': 'GET', '/curves': 'GET', '/stats': 'GET',
+                  '/simulate': 'POST', '/batch': 'POST'}
+        if path not in routes:
+            raise HTTPError(404, f'no such path: {path}')
+        if method != routes[path]:
+            raise HTTPError(405, f'{path} only accepts {routes[path]}')
+
+        if path == '/health':
+            return {'status': 'ok'}
+        if path == '/curves':
+            return self.defaults
+        if path == '/stats':
+            return {**self.stats, 'cache_entries': len(self._cache),
+                    'pending': len(self._pending)}
+
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError as error:
+            raise HTTPError(400, f'invalid JSON: {error}') from error
+
+        if path == '/simulate':
+            requests = [ProjectionRequest.from_json(data, self.defaults)]
+        elif isinstance(data, dict) and isinstance(data.get('requests'), list):
+            requests = [ProjectionRequest.from_json(item, self.defaults)
+                        for item in data['requests']]
+        else:
+            raise HTTPError(400, "a batch must be a JSON object with a 'requests' list")
+
+        try:
+            results = await asyncio.gather(*(self.project(r) for r in requests))
+        except ValueError as error:
+            # The curves of a request are outside the domain of their models
+            raise HTTPError(400, str(error)) from error
+        return results[0] if path == '/simulate' else {'results': results}
+
+    async def serve_client(self, reader: asyncio.StreamReader,
+                           writer: asyncio.StreamWriter) -> None:
+        """Answer the HTTP request of a connection, then close it."""
+        try:
+            try:
+                method, path, body = await _read_request(reader)
+                response = await self.handle(method, path, body)
+                # NaN and Infinity are not valid JSON, so they fail the request instead
+                status, content = 200, json.dumps(response, allow_nan=False)
+            except HTTPError as error:
+                status, content = error.status, json.dumps({'error': error.message})
+            except Exception as error:  # a failed simulation must not stop the service
+                status, content = 500, json.dumps({'error': f'{type(error).__name__}: {error}'})
+
+            content = content.encode('utf-8')
+            writer.write(f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+                         f'Content-Type: application/json\r\n'
+                         f'Content-Length: {len(content)}\r\n'
+                         f'Connection: close\r\n\r\n'.encode('latin-1') + content)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def run_projection(request: ProjectionRequest) -> Dict[str, Any]:
+    """Simulate the given request and return its projection as a JSON object.
+
+    The projection gives the years, the percentiles, the band of each percentile of
+    'emission', 'deforestation' and 'temperature' in each year, and the mean
+    temperature of the last year.
+    """
+    result = simulate(request.emission_curve, request.deforestation_curve,
+                      request.correlation, request.start_temp, request.runs, request.years,
+                      request.seed)
+    return {
+        'request': asdict(request),
+        'years': result.years.tolist(),
+        'bands': {name: band.tolist() for name, band in
+                  result.bands(request.percentiles).items()},
+        'final_mean': float(result.temperature[:, -1].mean())
+    }
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+    """Return the method, path and body of the HTTP request read from reader.
+
+    Raise HTTPError if the request is malformed or its body is too large.
+    """
+    parts = (await reader.readline()).decode('latin-1').split()
+    if len(parts) != 3:
+        raise HTTPError(400, 'malformed request line')
+    method, target = parts[0], parts[1]
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError as error:
+        raise HTTPError(400, 'malformed Content-Length') from error
+    if length > MAX_BODY:
+        raise HTTPError(413, f'the body must be at most {MAX_BODY} bytes')
+
+    try:
+        body = await reader.readexactly(length)
+    except asyncio.IncompleteReadError as error:
+        raise HTTPError(400, 'the body is shorter than its Content-Length') from error
+    return (method, target.split('?', 1)[0], body)
+
+
+def _integer(value: Any, low: int, high: int, name: str) -> int:
+    """Return value as an integer, or raise ValueError if it is not an integer between
+    low and high inclusive.
+    """
+    if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+        raise ValueError(f'{name} must be an integer between {low} and {high}')
+    return value
+
+
+def _number(value: Any, name: str) -> float:
+    """Return value as a float, or raise ValueError if it is not a finite number."""
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f'{name} must be finite')
+    return number
+
+
+def _floats(value: Any, length: int, name: str) -> Tuple[float, ...]:
+    """Return value as a tuple of floats, or raise ValueError if it is not a list of
+    length finite numbers.
+    """
+    if not isinstance(value, list) or len(value) != length:
+        raise ValueError(f'{name} must be a list of {length} numbers')
+    return tuple(_number(v, name) for v in value)
+
+
+async def serve(service: ProjectionService, host: str = HOST, port: int = PORT) -> None:
+    """Answer requests to service on the given address until cancelled."""
+    server = await asyncio.start_server(service.serve_client, host, port)
+    async with server:
+        print(f'Serving projections on http://{host}:{port}')
+        await server.serve_forever()
+
+
+def _ignore_interrupts() -> None:
+    """Leave the interrupts of a terminal to the main process of the service, which shuts
+    down the workers itself.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Start the service with the options given by argv."""
+    parser = argparse.ArgumentParser(description='Serve projections of the simulation game.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='the number of worker processes running simulations')
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE,
+                        help='the number of results kept in the cache')
+    args = parser.parse_args(argv)
+
+    # Workers are spawned rather than forked, so they never hold on to the sockets of the
+    # connections open when they start, which would keep those connections from closing
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context,
+                             initializer=_ignore_interrupts) as executor:
+        service = ProjectionService(ClimateDataset(), executor, args.cache_size)
+        try:
+            asyncio.run(serve(service, args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
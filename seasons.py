@@ -0,0 +1,189 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module contains functions that compute yearly statistics of
+the temperature data processed by 'process_data.py' over windows of
+months, such as the meteorological seasons, any set of months, or every
+run of consecutive months. The statistics of every window are computed
+together, and the windows at the edges of the data that lack some of
+their months are left out.
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+from typing import Dict, Tuple, Any, Collection, Sequence
+
+import numpy
+
+from aggregate_data import aggregate_columns, to_mapping
+from process_data import TemperatureTable
+
+# The abbreviated name of each month
+MONTH_NAMES = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+# The meteorological seasons, and the months analysed by the rest of the project
+SEASONS = {
+    'DJF': (12, 1, 2),
+    'MAM': (3, 4, 5),
+    'JJA': (6, 7, 8),
+    'SON': (9, 10, 11),
+    'AS': (8, 9)
+}
+
+
+def rolling_windows(length: int) -> Dict[str, Tuple[int, ...]]:
+    """Return every window of length consecutive months, including the ones that wrap
+    around the end of the year, named by their first and last months.
+
+    Preconditions:
+        - 1 <= length <= 12
+
+    >>> rolling_windows(3)['Dec-Feb']
+    (12, 1, 2)
+    >>> len(rolling_windows(3))
+    12
+    """
+    windows = {}
+    for first in range(12):
+        months = tuple((first + i) % 12 + 1 for i in range(length))
+        name = MONTH_NAMES[months[0] - 1]
+        if length > 1:
+            name += '-' + MONTH_NAMES[months[-1] - 1]
+        windows[name] = months
+    return windows
+
+
+def window_years(table: TemperatureTable, months: Sequence[int]) \
+        -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Return the mask of the records of table whose month is in the given window of
+    months, and the year of the window each record belongs to.
+
+    A window that wraps around the end of the year, such as (12, 1, 2), belongs to the
+    year of its last month, so its months after that month belong to the next year.
+    The last month is found by last_month, so the order of months does not matter.
+
+    Preconditions:
+        - len(months) > 0
+        - all(m in range(1, 13) for m in months)
+
+    >>> table = TemperatureTable(prov=numpy.array(['YT', 'YT', 'YT']),
+    ...                          year=numpy.array([1991, 1992, 1992]),
+    ...                          month=numpy.array([12, 1, 7]),
+    ...                          temp=numpy.array([-20.0, -24.0, 14.0]))
+    >>> mask, year = window_years(table, (1, 12, 2))
+    >>> mask.tolist(), year[mask].tolist()
+    ([True, True, False], [1992, 1992])
+    """
+    mask = numpy.isin(table.month, list(months))
+    year = table.year + (table.month > last_month(months))
+    return (mask, year)
+
+
+def last_month(months: Collection[int]) -> int:
+    """Return the last month of the given window of months, which is the month followed
+    by the longest run of months outside the window, going around the end of the year.
+    If there are several such months, the window does not wrap around the end of the
+    year unless it has to.
+
+    Preconditions:
+        - len(months) > 0
+        - all(m in range(1, 13) for m in months)
+
+    >>> last_month((1, 12, 2))
+    2
+    >>> last_month({11, 12, 1, 2, 3})
+    3
+    >>> last_month(range(1, 13))
+    12
+    >>> last_month((7, 1))
+    7
+    """
+    ordered = sorted(set(months))
+    # The gap after each month, starting with the latest month of the year, which is the
+    # only last month that does not wrap around the end of the year
+    ends = [ordered[-1]] + ordered[:-1]
+    gaps = [ordered[0] + 12 - ordered[-1]] + \
+        [after - before for before, after in zip(ordered, ordered[1:])]
+    return ends[gaps.index(max(gaps))]
+
+
+def seasonal_stats(table: TemperatureTable, windows: Dict[str, Sequence[int]],
+                   by: Sequence[str] = ('year',), stat: str = 'median',
+                   complete: bool = True) -> Dict[str, Dict[Any, float]]:
+    """Return the given statistic of the mean temperatures of table for every window of
+    windows, which maps the name of each window to its months, grouped by the by columns.
+
+    The result maps the name of each window to a mapping of group key to statistic, like
+    to_mapping. A 'year' group is the year of the window each record belongs to, as in
+    window_years. Records in several windows count toward each of them, and all windows
+    are computed together rather than one at a time.
+
+    If complete is True, a group is left out of the result of a window unless it has
+    records of every month of the window, so that e.g. the DJF of the last year of the
+    data is not reported from its December alone. This has no effect if 'month' is in by.
+
+    Preconditions:
+        - all(name in {'prov', 'year', 'month', 'station'} for name in by)
+
+    >>> table = TemperatureTable(prov=numpy.array(['YT', 'YT', 'YT', 'YT', 'YT']),
+    ...                          year=numpy.array([1991, 1992, 1992, 1992, 1992]),
+    ...                          month=numpy.array([12, 1, 2, 7, 8]),
+    ...                          temp=numpy.array([-20.0, -24.0, -22.0, 14.0, 12.0]))
+    >>> result = seasonal_stats(table, {'DJF': (12, 1, 2), 'JJA': (6, 7, 8)})
+    >>> result['DJF'], result['JJA']
+    ({1992: -22.0}, {})
+    >>> seasonal_stats(table, {'JJA': (6, 7, 8)}, complete=False)['JJA']
+    {1992: 13.0}
+    """
+    names = list(windows)
+    if names == []:
+        return {}
+
+    window_ids, values, months = [], [], []
+    keys = {name: [] for name in by}
+    for i, name in enumerate(names):
+        mask, year = window_years(table, windows[name])
+        window_ids.append(numpy.full(numpy.count_nonzero(mask), i))
+        values.append(table.temp[mask])
+        months.append(table.month[mask])
+        for column in by:
+            keys[column].append((year if column == 'year' else getattr(table, column))[mask])
+
+    columns = {'window': numpy.concatenate(window_ids)}
+    columns.update((column, numpy.concatenate(keys[column])) for column in by)
+    values = numpy.concatenate(values)
+    result = aggregate_columns(columns, values, [stat])
+
+    if complete and 'month' not in by:
+        covered = _month_coverage(columns, numpy.concatenate(months), values)
+        required = numpy.array([len(set(windows[name])) for name in names])
+        keep = covered == required[result['window']]
+        result = {key: column[keep] for key, column in result.items()}
+
+    # The groups are sorted by window first, so each window is a contiguous slice
+    bounds = numpy.searchsorted(result['window'], numpy.arange(len(names) + 1))
+    seasonal = {}
+    for i, name in enumerate(names):
+        part = {key: column[bounds[i]:bounds[i + 1]] for key, column in result.items()}
+        seasonal[name] = to_mapping(part, list(by), stat)
+    return seasonal
+
+
+def _month_coverage(columns: Dict[str, numpy.ndarray], months: numpy.ndarray,
+                    values: numpy.ndarray) -> numpy.ndarray:
+    """Return the number of distinct months among the records of each group of
+    aggregate_columns(columns, values), in the same order as its groups.
+    """
+    distinct = aggregate_columns({**columns, 'month': months}, values, ['count'])
+    groups = {name: distinct[name] for name in columns}
+    return aggregate_columns(groups, numpy.ones(len(distinct['month'])), ['count'])['count']
+
+
+if __name__ == '__main__':
+    import python_ta.contracts
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
@@ -0,0 +1,252 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module contains functions that run the projection of the
+simulation game in 'game.py' for many independent games at once, without
+any interface, so that the distribution of possible outcomes can be
+studied.
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+import itertools
+import os
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Any, Callable, Optional, Sequence
+
+import numpy
+
+from models import LOG_MODEL, RECIPROCAL_MODEL, LINEAR_MODEL
+
+# The first year of every game
+START_YEAR = 2020
+
+# The bounds of the random noise added to each year's emission and deforestation
+EMISSION_NOISE = 30
+DEFORESTATION_NOISE = 3000
+
+# The probability that a hydroelectric reservoir is developed in a year, and the bounds
+# of the deforestation it causes
+HYDRO_PROBABILITY = 1 / 20
+HYDRO_DEFORESTATION = (20000, 30000)
+
+# The percentiles reported by SimulationResult.bands by default
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+@dataclass
+class SimulationResult:
+    """The trajectories of a batch of simulated games.
+
+    Every trajectory array has one row per game and one column per year.
+
+    Instance Attributes:
+        - years: the years of the simulation, starting at START_YEAR
+        - emission: emission of each game and year (Megatonnes of CO2 equivalent)
+        - deforestation: deforestation of each game and year (Hectares)
+        - temperature: temperature of each game and year (Degrees Celsius)
+        - hydro: whether a hydroelectric reservoir was developed in each game and year
+
+    Representation Invariants:
+        - self.emission.shape == self.deforestation.shape == self.temperature.shape
+        - self.emission.shape == self.hydro.shape
+        - self.emission.shape[1] == len(self.years)
+    """
+    years: numpy.ndarray
+    emission: numpy.ndarray
+    deforestation: numpy.ndarray
+    temperature: numpy.ndarray
+    hydro: numpy.ndarray
+
+    def bands(self, percentiles: Sequence[float] = PERCENTILES) -> Dict[str, numpy.ndarray]:
+        """Return the given percentiles of emission, deforestation and temperature
+        across all games, as arrays with one row per percentile and one column per year.
+        """
+        return {name: numpy.percentile(getattr(self, name), percentiles, axis=0)
+                for name in ('emission', 'deforestation', 'temperature')}
+
+
+def simulate(emission_predict: Tuple[float, float, float],
+             deforestation_predict: Tuple[float, float, float],
+             correlation: Tuple[float, float, float, float, float],
+             start_temp: float, n_runs: int, n_years: int,
+             seed: Optional[int] = None) -> SimulationResult:
+    """Simulate n_runs independent games for n_years years after START_YEAR, following
+    the same model as TemperatureGame, and return their trajectories.
+
+    The same seed always gives the same result.
+
+    Preconditions:
+        - n_runs > 0
+        - n_years >= 0
+    """
+    return simulate_with_generator(emission_predict, deforestation_predict, correlation,
+                                   start_temp, n_runs, n_years, numpy.random.default_rng(seed))
+
+
+def simulate_with_generator(emission_predict: Tuple[float, float, float],
+                            deforestation_predict: Tuple[float, float, float],
+                            correlation: Tuple[float, float, float, float, float],
+                            start_temp: float, n_runs: int, n_years: int,
+                            rng: numpy.random.Generator) -> SimulationResult:
+    """Same as simulate, but draw every random number from rng."""
+    years = numpy.arange(START_YEAR, START_YEAR + n_years + 1)
+    shape = (n_runs, n_years + 1)
+
+    emission = LOG_MODEL.evaluate(years, emission_predict) + \
+        rng.uniform(-EMISSION_NOISE, EMISSION_NOISE, shape)
+    deforestation = RECIPROCAL_MODEL.evaluate(years, deforestation_predict) + \
+        rng.uniform(-DEFORESTATION_NOISE, DEFORESTATION_NOISE, shape)
+
+    # There is never a hydroelectric development in the first year
+    hydro = rng.random(shape) < HYDRO_PROBABILITY
+    hydro[:, 0] = False
+    deforestation += hydro * rng.uniform(*HYDRO_DEFORESTATION, shape)
+
+    change = LINEAR_MODEL.evaluate((emission, deforestation), correlation)
+    change[:, 0] = 0
+    temperature = start_temp + numpy.cumsum(change, axis=1)
+
+    return SimulationResult(years, emission, deforestation, temperature, hydro)
+
+
+@dataclass
+class Scenario:
+    """The parameters of a simulated game.
+
+    Instance Attributes:
+        - emission_predict: prediction curve of emission
+        - deforestation_predict: prediction curve of deforestation
+        - correlation: correlation between temperature and (emission and deforestation)
+        - start_temp: temperature of the first year
+    """
+    emission_predict: Tuple[float, float, float]
+    deforestation_predict: Tuple[float, float, float]
+    correlation: Tuple[float, float, float, float, float]
+    start_temp: float
+
+
+@dataclass
+class SweepResult:
+    """The percentile bands of every scenario of a sweep.
+
+    Instance Attributes:
+        - scenarios: the simulated scenarios
+        - years: the years of the simulation
+        - percentiles: the percentiles of each band
+        - bands: mapping of 'emission', 'deforestation' and 'temperature' to an array of
+          shape (len(scenarios), len(percentiles), len(years))
+        - final_mean: the mean temperature of the last year of each scenario
+
+    Representation Invariants:
+        - all(band.shape[0] == len(self.scenarios) for band in self.bands.values())
+        - len(self.final_mean) == len(self.scenarios)
+    """
+    scenarios: List[Scenario]
+    years: numpy.ndarray
+    percentiles: Tuple[float, ...]
+    bands: Dict[str, numpy.ndarray]
+    final_mean: numpy.ndarray
+
+
+def scenario_grid(emission_curves: Sequence[Tuple[float, float, float]],
+                  deforestation_curves: Sequence[Tuple[float, float, float]],
+                  correlations: Sequence[Tuple[float, float, float, float, float]],
+                  start_temps: Sequence[float]) -> List[Scenario]:
+    """Return one scenario for every combination of the given parameters."""
+    return [Scenario(*params) for params in
+            itertools.product(emission_curves, deforestation_curves, correlations, start_temps)]
+
+
+def sample_scenarios(base: Scenario, n: int, seed: int,
+                     emission_cov: Optional[numpy.ndarray] = None,
+                     deforestation_cov: Optional[numpy.ndarray] = None,
+                     correlation_cov: Optional[numpy.ndarray] = None,
+                     start_temp_std: float = 0.0) -> List[Scenario]:
+    """Return n scenarios whose parameters are drawn from normal distributions centred
+    on the parameters of base, e.g. using the covariances returned by curve_fit.
+
+    A covariance of None keeps the corresponding parameters fixed.
+    """
+    rng = numpy.random.default_rng(numpy.random.SeedSequence(seed))
+
+    def draw(mean: Tuple[float, ...], cov: Optional[numpy.ndarray]) -> List[Tuple[float, ...]]:
+        if cov is None:
+            return [tuple(mean)] * n
+        return [tuple(row) for row in rng.multivariate_normal(mean, cov, n).tolist()]
+
+    emission = draw(base.emission_predict, emission_cov)
+    deforestation = draw(base.deforestation_predict, deforestation_cov)
+    correlation = draw(base.correlation, correlation_cov)
+    start_temps = (base.start_temp + rng.normal(0, start_temp_std, n)).tolist()
+
+    return [Scenario(*params) for params in
+            zip(emission, deforestation, correlation, start_temps)]
+
+
+def sweep(scenarios: Sequence[Scenario], n_runs: int, n_years: int, seed: int,
+          workers: Optional[int] = None, percentiles: Sequence[float] = PERCENTILES,
+          on_result: Optional[Callable[[int, Dict[str, numpy.ndarray]], Any]] = None) -> \
+        SweepResult:
+    """Simulate n_runs games of n_years years for every scenario in a pool of worker
+    processes, and return the percentile bands of each scenario.
+
+    Every scenario draws from its own stream spawned from seed with SeedSequence, so the
+    result is bit-for-bit the same for any number of workers. The bands of each scenario
+    are stored as soon as it finishes, and on_result(index, bands) is called if given.
+    If workers is None, one worker per CPU is used; if it is at most 1, the scenarios are
+    simulated in this process.
+    """
+    seeds = numpy.random.SeedSequence(seed).spawn(len(scenarios))
+    percentiles = tuple(percentiles)
+    years = numpy.arange(START_YEAR, START_YEAR + n_years + 1)
+    bands = {name: numpy.empty((len(scenarios), len(percentiles), len(years)))
+             for name in ('emission', 'deforestation', 'temperature')}
+    final_mean = numpy.empty(len(scenarios))
+
+    def store(index: int, result: Tuple[Dict[str, numpy.ndarray], float]) -> None:
+        scenario_bands, final_mean[index] = result
+        for name, band in scenario_bands.items():
+            bands[name][index] = band
+        if on_result is not None:
+            on_result(index, scenario_bands)
+
+    tasks = [(scenario, n_runs, n_years, child, percentiles)
+             for scenario, child in zip(scenarios, seeds)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        for index, task in enumerate(tasks):
+            store(index, _run_scenario(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_run_scenario, task): index
+                       for index, task in enumerate(tasks)}
+            for future in as_completed(futures):
+                store(futures[future], future.result())
+
+    return SweepResult(list(scenarios), years, percentiles, bands, final_mean)
+
+
+def _run_scenario(task: Tuple[Scenario, int, int, numpy.random.SeedSequence,
+                              Tuple[float, ...]]) -> Tuple[Dict[str, numpy.ndarray], float]:
+    """Simulate a scenario of a sweep and return its bands and mean final temperature."""
+    scenario, n_runs, n_years, seed, percentiles = task
+    result = simulate_with_generator(scenario.emission_predict, scenario.deforestation_predict,
+                                     scenario.correlation, scenario.start_temp, n_runs, n_years,
+                                     numpy.random.default_rng(seed))
+    return (result.bands(percentiles), float(result.temperature[:, -1].mean()))
+
+
+if __name__ == '__main__':
+    import python_ta.contracts
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
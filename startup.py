@@ -0,0 +1,131 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module keeps the modules of the project quick to import. It
+contains the LazyModule class, which defers importing a heavy library
+until one of its attributes is used, and a check that imports each module
+of the project in a fresh interpreter and fails if the import takes longer
+than its budget or loads a heavy library it does not need. Run this file
+with --help for its options.
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+
+from typing import List, Dict, Tuple, Any, Optional
+
+# The heavy libraries that are only imported by the code paths needing them
+HEAVY_MODULES = ('scipy', 'plotly', 'pygame')
+
+# The maximum import time in seconds of each module of the project, and the heavy
+# libraries that importing it must not load
+IMPORT_BUDGETS = {
+    'process_data': (0.5, ('scipy', 'plotly', 'pygame')),
+    'dataset': (0.5, ('scipy', 'plotly', 'pygame')),
+    'simulation': (0.5, ('scipy', 'plotly', 'pygame')),
+    'game': (0.5, ('scipy', 'plotly', 'pygame')),
+    'main': (0.5, ('scipy', 'plotly', 'pygame')),
+    'visualize_data': (1.0, ('scipy', 'pygame'))
+}
+
+# The directory containing this module
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The code run in a fresh interpreter to time the import of a module
+_TIMER = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'modules': sorted(sys.modules)}}))
+"""
+
+
+class LazyModule:
+    """A module that is only imported when one of its attributes is first used.
+
+    Instance Attributes:
+        - name: the full name of the module
+
+    Sample usage:
+    >>> json_module = LazyModule('json')
+    >>> json_module.dumps([1])
+    '[1]'
+    """
+    name: str
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        """Return the attribute of the module, importing the module if needed."""
+        return getattr(importlib.import_module(self.name), attr)
+
+    def __repr__(self) -> str:
+        return f'LazyModule({self.name!r})'
+
+
+def measure_import(module: str, repeat: int = 3) -> Tuple[float, List[str]]:
+    """Return the shortest time in seconds of importing module in a fresh interpreter
+    over repeat tries, and the heavy libraries the import loaded.
+    """
+    times = []
+    loaded = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _TIMER.format(module=module)],
+                                cwd=_PROJECT_DIR, capture_output=True, text=True, check=True)
+        result = json.loads(output.stdout.splitlines()[-1])
+        times.append(result['seconds'])
+        loaded = [name for name in HEAVY_MODULES if name in result['modules']]
+    return (min(times), loaded)
+
+
+def check_imports(budgets: Dict[str, Tuple[float, Tuple[str, ...]]],
+                  repeat: int = 3) -> List[Dict[str, Any]]:
+    """Return the result of importing every module of budgets, flagging the ones that
+    are slower than their budget or load a heavy library they must not load.
+    """
+    results = []
+    for module, (budget, forbidden) in budgets.items():
+        seconds, loaded = measure_import(module, repeat)
+        unexpected = [name for name in loaded if name in forbidden]
+        results.append({'module': module, 'seconds': seconds, 'budget_s': budget,
+                        'loaded': loaded, 'failed': seconds > budget or unexpected != []})
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Check the import time of the modules given by argv, and return 1 if any of
+    them failed its budget, or 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description='Check the import time of the project.')
+    parser.add_argument('modules', nargs='*', help='the modules to check, by default all of '
+                        + ', '.join(IMPORT_BUDGETS))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    modules = args.modules or list(IMPORT_BUDGETS)
+    unknown = [module for module in modules if module not in IMPORT_BUDGETS]
+    if unknown != []:
+        parser.error(f'no import budget for {", ".join(unknown)}')
+
+    results = check_imports({module: IMPORT_BUDGETS[module] for module in modules}, args.repeat)
+    for result in results:
+        status = 'FAIL' if result['failed'] else 'ok'
+        print(f"{result['module']:>16}  {result['seconds']:.3f}s / {result['budget_s']:.1f}s  "
+              f"{status:>4}  {', '.join(result['loaded'])}")
+    return int(any(result['failed'] for result in results))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module contains the StationCatalogue class, which describes
+every weather station that recorded the temperature data processed by
+'process_data.py', and answers nearest-station and bounding-box queries
+through a spatial index of the station coordinates.
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Any, Collection, Optional, Sequence, Tuple
+
+import numpy
+
+from aggregate_data import aggregate
+from process_data import TemperatureTable
+from startup import LazyModule
+
+# scipy.spatial, imported when the first catalogue is made
+spatial = LazyModule('scipy.spatial')
+
+# The mean radius of the Earth in kilometres
+EARTH_RADIUS = 6371.0
+
+# The optional columns of a TemperatureTable that a StationCatalogue is made from
+STATION_COLUMNS = ('station', 'lat', 'lon')
+
+
+@dataclass
+class StationCatalogue:
+    """The weather stations that recorded a collection of temperature data, sorted by id.
+
+    Instance Attributes:
+        - station: the id of each station
+        - prov: the province of each station
+        - lat: the latitude of each station in degrees
+        - lon: the longitude of each station in degrees
+        - records: the number of temperature records of each station
+        - first_year: the first year in which each station recorded a temperature
+        - last_year: the last year in which each station recorded a temperature
+
+    Representation Invariants:
+        - all(len(column) == len(self.station) for column in
+          (self.prov, self.lat, self.lon, self.records, self.first_year, self.last_year))
+        - all(-90 <= x <= 90 for x in self.lat)
+        - all(-180 <= x <= 180 for x in self.lon)
+
+    Sample usage:
+    >>> table = TemperatureTable(prov=numpy.array(['MB', 'MB', 'NU']),
+    ...                          year=numpy.array([1991, 1992, 1991]),
+    ...                          month=numpy.array([8, 8, 8]),
+    ...                          temp=numpy.array([18.0, 17.0, 6.0]),
+    ...                          station=numpy.array(['5010240', '5010240', '2400305']),
+    ...                          lat=numpy.array([50.4, 50.4, 63.7]),
+    ...                          lon=numpy.array([-101.0, -101.0, -68.5]))
+    >>> catalogue = StationCatalogue.from_tables([table])
+    >>> catalogue.nearest(49.9, -97.1)[0].tolist()
+    ['5010240']
+    """
+    station: numpy.ndarray
+    prov: numpy.ndarray
+    lat: numpy.ndarray
+    lon: numpy.ndarray
+    records: numpy.ndarray
+    first_year: numpy.ndarray
+    last_year: numpy.ndarray
+    _tree: Any = field(init=False, repr=False)
+    _by_lat: numpy.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Build the spatial indexes of the station coordinates."""
+        self._tree = spatial.cKDTree(_unit_vectors(self.lat, self.lon))
+        self._by_lat = numpy.argsort(self.lat, kind='stable')
+
+    def __len__(self) -> int:
+        return len(self.station)
+
+    @staticmethod
+    def from_tables(tables: Sequence[TemperatureTable]) -> 'StationCatalogue':
+        """Return the catalogue of the stations that recorded the given tables.
+
+        Each station is placed at the coordinates of its first record. Records whose
+        station or coordinates are not loaded or are missing are ignored.
+        """
+        tables = [t for t in tables
+                  if t.station is not None and t.lat is not None and t.lon is not None]
+        if tables == []:
+            empty = numpy.zeros(0)
+            return StationCatalogue(numpy.zeros(0, dtype=str), numpy.zeros(0, dtype='<U2'),
+                                    empty, empty, numpy.zeros(0, dtype=numpy.intp),
+                                    numpy.zeros(0, dtype=numpy.int32),
+                                    numpy.zeros(0, dtype=numpy.int32))
+
+        table = TemperatureTable.concatenate(tables)
+        table = table.select((table.station != '') & ~numpy.isnan(table.lat)
+                             & ~numpy.isnan(table.lon))
+        station, first, inverse, records = numpy.unique(
+            table.station, return_index=True, return_inverse=True, return_counts=True)
+
+        first_year = numpy.full(len(station), numpy.iinfo(numpy.int32).max, dtype=numpy.int32)
+        last_year = numpy.full(len(station), numpy.iinfo(numpy.int32).min, dtype=numpy.int32)
+        numpy.minimum.at(first_year, inverse, table.year)
+        numpy.maximum.at(last_year, inverse, table.year)
+
+        return StationCatalogue(station, table.prov[first], table.lat[first],
+                                table.lon[first], records, first_year, last_year)
+
+    def index_of(self, stations: Collection[str]) -> numpy.ndarray:
+        """Return the position of each of the given stations in this catalogue.
+
+        Raise KeyError if a station is not in this catalogue.
+        """
+        stations = numpy.asarray(list(stations), dtype=self.station.dtype)
+        index = numpy.searchsorted(self.station, stations)
+        found = index < len(self.station)
+        found[found] = self.station[index[found]] == stations[found]
+        if not numpy.all(found):
+            raise KeyError(f'unknown station {stations[~found][0]!r}')
+        return index
+
+    def nearest(self, lat: float, lon: float, n: int = 1) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Return the ids of the n stations nearest to the given coordinates, nearest
+        first, and their great-circle distances from the coordinates in kilometres.
+        """
+        n = min(n, len(self))
+        if n == 0:
+            return (self.station[:0], numpy.zeros(0))
+
+        chord, index = self._tree.query(
+            _unit_vectors(numpy.array([lat]), numpy.array([lon]))[0], k=n)
+        chord, index = numpy.atleast_1d(chord), numpy.atleast_1d(index)
+        return (self.station[index],
+                2 * EARTH_RADIUS * numpy.arcsin(numpy.minimum(chord / 2, 1.0)))
+
+    def within(self, lat: float, lon: float, radius: float) -> numpy.ndarray:
+        """Return the ids of the stations at most radius kilometres from the given
+        coordinates, sorted by id.
+        """
+        # The straight-line distance between points of the unit sphere that are radius
+        # kilometres apart along the surface
+        chord = 2 * numpy.sin(min(radius / EARTH_RADIUS, numpy.pi) / 2)
+        index = self._tree.query_ball_point(
+            _unit_vectors(numpy.array([lat]), numpy.array([lon]))[0], chord)
+        return self.station[numpy.sort(numpy.array(index, dtype=numpy.intp))]
+
+    def in_box(self, lat_min: float, lat_max: float,
+               lon_min: float, lon_max: float) -> numpy.ndarray:
+        """Return the ids of the stations whose latitude is between lat_min and lat_max
+        and whose longitude is between lon_min and lon_max, sorted by id.
+        """
+        lat = self.lat[self._by_lat]
+        start = numpy.searchsorted(lat, lat_min, side='left')
+        stop = numpy.searchsorted(lat, lat_max, side='right')
+        index = self._by_lat[start:stop]
+        index = index[(self.lon[index] >= lon_min) & (self.lon[index] <= lon_max)]
+        return self.station[numpy.sort(index)]
+
+    def distance(self, lat: float, lon: float) -> numpy.ndarray:
+        """Return the great-circle distance in kilometres from the given coordinates
+        to every station.
+        """
+        lat1, lon1 = numpy.radians(lat), numpy.radians(lon)
+        lat2, lon2 = numpy.radians(self.lat), numpy.radians(self.lon)
+        h = numpy.sin((lat2 - lat1) / 2) ** 2 + \
+            numpy.cos(lat1) * numpy.cos(lat2) * numpy.sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS * numpy.arcsin(numpy.sqrt(numpy.minimum(h, 1.0)))
+
+    def station_stats(self, table: TemperatureTable, stats: Sequence[str] = ('median',),
+                      value: str = 'temp') -> Dict[str, numpy.ndarray]:
+        """Return the given statistics of the value column of table for every station
+        of this catalogue, in the order of this catalogue.
+
+        The statistics of the stations with no record in table are NaN.
+        """
+        result = aggregate(table, ['station'], stats, value)
+        present = numpy.isin(result['station'], self.station)
+        index = self.index_of(result['station'][present])
+        columns = {}
+        for stat in stats:
+            column = numpy.full(len(self), numpy.nan)
+            column[index] = result[stat][present]
+            columns[stat] = column
+        return columns
+
+
+def regional_stat(table: TemperatureTable, stations: Collection[str],
+                  stat: str = 'median', years: Optional[Collection[int]] = None) \
+        -> Dict[int, float]:
+    """Return the yearly statistic of the mean temperatures of table recorded by the
+    given stations, for the given years or every year if years is None.
+
+    >>> table = TemperatureTable(prov=numpy.array(['MB', 'MB', 'NU']),
+    ...                          year=numpy.array([1991, 1991, 1991]),
+    ...                          month=numpy.array([8, 9, 8]),
+    ...                          temp=numpy.array([18.0, 12.0, 6.0]),
+    ...                          station=numpy.array(['5010240', '5010240', '2400305']))
+    >>> regional_stat(table, ['5010240'])
+    {1991: 15.0}
+    """
+    if table.station is None:
+        raise ValueError("column 'station' is not loaded in the table")
+
+    mask = numpy.isin(table.station, list(stations))
+    if years is not None:
+        mask &= numpy.isin(table.year, list(years))
+    result = aggregate(table.select(mask), ['year'], [stat])
+    return dict(zip(result['year'].tolist(), result[stat].tolist()))
+
+
+def _unit_vectors(lat: numpy.ndarray, lon: numpy.ndarray) -> numpy.ndarray:
+    """Return the points of the unit sphere at the given coordinates, one row per point."""
+    lat, lon = numpy.radians(lat), numpy.radians(lon)
+    return numpy.column_stack((numpy.cos(lat) * numpy.cos(lon),
+                               numpy.cos(lat) * numpy.sin(lon),
+                               numpy.sin(lat)))
+
+
+if __name__ == '__main__':
+    import python_ta.contracts
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
@@ -0,0 +1,110 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module generates synthetic temperature files with the same
+columns as the Environment Canada monthly station data in the
+'temperature' directory, so that the data processing can be tested and
+benchmarked at any size without downloading anything.
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+import csv
+
+from typing import List
+
+import numpy
+
+# The header of the Environment Canada monthly station data
+HEADER = ['x', 'y', 'lat__lat', 'lon__long', 'identifier__identifiant', 'station_id__id_station',
+          'period_value__valeur_periode', 'period_group__groupe_periode', 'province__province',
+          'date', 'temp_mean__temp_moyenne', 'temp_mean_units__temp_moyenne_unites',
+          'temp_max__temp_max', 'temp_max_units__temp_max_unites', 'temp_min__temp_min',
+          'temp_min_units__temp_min_unites', 'total_precip__precip_totale',
+          'total_precip_units__precip_totale_unites', 'rain__pluie', 'rain_units__pluie_unites',
+          'snow__neige', 'snow_units__neige_unites', 'pressure_sea_level__pression_niveau_mer',
+          'pressure_sea_level_units__pression_niveau_mer_unite',
+          'pressure_station__pression_station',
+          'pressure_station_units__pression_station_unites', 'wind_speed__vitesse_vent',
+          'wind_speed_units__vitesse_vent_unites']
+
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# The years covered by the generated data
+FIRST_YEAR = 1991
+LAST_YEAR = 2019
+
+# The fraction of generated measurements that are missing
+MISSING_FRACTION = 0.1
+
+# The number of rows generated at a time
+CHUNK_ROWS = 100000
+
+
+def write_synthetic_province(filename: str, n_rows: int, prov: str = 'MB',
+                             seed: int = 0) -> None:
+    """Write a csv file of n_rows rows of synthetic monthly station data for the given
+    province to filename.
+
+    Each station reports every month from FIRST_YEAR to LAST_YEAR, with a seasonal mean
+    temperature, noise, a slow warming trend, and missing values written either as an
+    empty field or as -9999.9, like the real data.
+
+    Preconditions:
+        - n_rows >= 0
+    """
+    rng = numpy.random.default_rng(seed)
+    months_per_station = (LAST_YEAR - FIRST_YEAR + 1) * 12
+
+    with open(filename, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(HEADER)
+        for start in range(0, n_rows, CHUNK_ROWS):
+            size = min(CHUNK_ROWS, n_rows - start)
+            writer.writerows(_synthetic_rows(numpy.arange(start, start + size), prov,
+                                             months_per_station, rng))
+
+
+def _synthetic_rows(index: numpy.ndarray, prov: str, months_per_station: int,
+                    rng: numpy.random.Generator) -> List[List[str]]:
+    """Return the synthetic rows with the given row indices."""
+    station = 1000000 + index // months_per_station
+    month_index = index % months_per_station
+    year = FIRST_YEAR + month_index // 12
+    month = month_index % 12 + 1
+
+    lat = 45 + (station % 97) * 0.2
+    lon = -60 - (station % 89) * 0.8
+    mean = -10 * numpy.cos((month - 1) / 12 * 2 * numpy.pi) - (lat - 45) * 0.4 + \
+        (year - FIRST_YEAR) * 0.03 + rng.normal(0, 2, len(index))
+    spread = rng.uniform(3, 8, len(index))
+    precip = rng.gamma(2, 20, len(index))
+
+    missing = (rng.random(len(index)) < MISSING_FRACTION).tolist()
+    sentinel = (rng.random(len(index)) < 0.5).tolist()
+
+    rows = []
+    for i, (st, y, m, la, lo, t, sp, pr) in enumerate(zip(
+            station.tolist(), year.tolist(), month.tolist(), lat.tolist(), lon.tolist(),
+            mean.tolist(), spread.tolist(), precip.tolist())):
+        temps = [f'{t:.1f}', f'{t + sp:.1f}', f'{t - sp:.1f}']
+        if missing[i]:
+            temps = ['-9999.9' if sentinel[i] else ''] * 3
+        rows.append([
+            f'{lo:.2f}', f'{la:.2f}', f'{la:.2f}', f'{lo:.2f}', f'{st}.{y}.{m:02d}', str(st),
+            MONTH_NAMES[m - 1], 'Monthly', prov, f'{y}-{m:02d}', temps[0], 'C', temps[1], 'C',
+            temps[2], 'C', f'{pr:.1f}', 'mm', f'{pr * 0.7:.1f}', 'mm', f'{pr * 0.3:.1f}', 'mm',
+            '', 'hPa', '', 'hPa', '', 'kph'
+        ])
+
+    return rows
+
+
+if __name__ == '__main__':
+    import python_ta.contracts
+    python_ta.contracts.DEBUG_CONTRACTS = False
+    python_ta.contracts.check_all_contracts()
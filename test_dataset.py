@@ -0,0 +1,104 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module contains the tests of the refresh method of the
+ClimateDataset class in 'dataset.py', which run on copies of the
+temperature files. Run it with pytest.
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+import os
+import shutil
+
+import pytest
+
+import dataset
+from dataset import ClimateDataset, PROVINCE_FILES
+
+# The provinces whose temperature files are copied for the tests
+TEST_PROVINCES = ('PE', 'YT')
+
+# The directory of the original temperature files
+_TEMP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temperature')
+
+
+@pytest.fixture
+def data(tmp_path) -> ClimateDataset:
+    """Return a dataset of copies of the temperature files of TEST_PROVINCES, with
+    their medians loaded.
+    """
+    temp_dir = tmp_path / 'temperature'
+    temp_dir.mkdir()
+    for prov in TEST_PROVINCES:
+        shutil.copy(os.path.join(_TEMP_DIR, PROVINCE_FILES[prov]), temp_dir)
+    dataset = ClimateDataset(str(temp_dir), cache_dir=str(tmp_path / 'cache'))
+    for prov in TEST_PROVINCES:
+        dataset.province_median(prov)
+    return dataset
+
+
+def _append_row(path: str, date: str, temp: str) -> int:
+    """Append a copy of the last row of the csv file at path with the given date and
+    mean temperature, and return the line number of the new row.
+    """
+    with open(path) as file:
+        lines = file.read().splitlines()
+    fields = lines[-1].split(',')
+    fields[9] = date
+    fields[10] = temp
+    with open(path, 'a') as file:
+        file.write(','.join(fields) + '\n')
+    return len(lines) + 1
+
+
+def test_refresh_appended_year_after_the_data(data: ClimateDataset) -> None:
+    """Test that a row of a year later than every other year gets its own median."""
+    assert 2020 not in data.province_median('PE')
+    _append_row(data.province_file('PE'), '2020-08', '30.5')
+
+    assert data.refresh() == {'PE'}
+    assert data.province_median('PE')[2020] == 30.5
+    assert data.refresh() == set()
+
+
+def test_refresh_row_appended_while_reading(data: ClimateDataset, monkeypatch) -> None:
+    """Test that a row appended between recording the state of a file and reading it is
+    read exactly once.
+    """
+    path = data.province_file('PE')
+    _append_row(path, '2020-08', '30.5')
+    source_state = dataset._source_state
+
+    def append_after_state(state_path: str) -> dataset.SourceState:
+        state = source_state(state_path)
+        monkeypatch.undo()
+        _append_row(path, '2020-09', '31.5')
+        return state
+
+    monkeypatch.setattr(dataset, '_source_state', append_after_state)
+    data.refresh()
+    data.refresh()
+    assert data.province_table('PE').filter(years={2020}).temp.tolist() == [30.5, 31.5]
+
+
+def test_refresh_deleted_file(data: ClimateDataset) -> None:
+    """Test that a province whose file was deleted is dropped instead of raising."""
+    os.remove(data.province_file('PE'))
+
+    assert 'PE' in data.refresh()
+    assert data.available_provinces() == ['YT']
+    with pytest.raises(FileNotFoundError):
+        data.province_median('PE')
+
+
+def test_refresh_warns_with_line_in_file(data: ClimateDataset) -> None:
+    """Test that a malformed appended row is reported at its line in the whole file."""
+    line = _append_row(data.province_file('YT'), '2020-13x', '1.0')
+
+    with pytest.warns(UserWarning, match=f'the first at line {line}:'):
+        data.refresh()
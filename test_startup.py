@@ -0,0 +1,51 @@
+"""CSC110 Fall 2020 Project
+
+Description
+===============================
+
+This Python module contains the tests of the import budgets in
+'startup.py', which import each module of the project in a fresh
+interpreter and check that it does not load a heavy library it does not
+need. Run it with pytest.
+
+Copyright Information
+===============================
+
+This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
+"""
+import json
+import os
+import subprocess
+import sys
+
+from typing import Set
+
+import pytest
+
+from startup import IMPORT_BUDGETS
+
+# The directory containing the modules of the project
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _imported_modules(module: str) -> Set[str]:
+    """Return the top-level modules loaded by importing module in a fresh interpreter
+    run with -X importtime, according to both sys.modules and the import time report.
+    """
+    code = f'import json, sys, {module}; print(json.dumps(sorted(sys.modules)))'
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=_PROJECT_DIR, capture_output=True, text=True, check=True)
+    loaded = set(json.loads(output.stdout.splitlines()[-1]))
+    # Each line of the report but its header ends with the name of an imported module
+    loaded.update(line.rsplit('|', 1)[-1].strip() for line in output.stderr.splitlines()
+                  if line.startswith('import time:') and '[us]' not in line)
+    return {name.split('.')[0] for name in loaded}
+
+
+@pytest.mark.parametrize('module', list(IMPORT_BUDGETS))
+def test_import_skips_heavy_modules(module: str) -> None:
+    """Test that importing module, e.g. process_data, loads none of the heavy libraries
+    it must not load, e.g. scipy, plotly and pygame.
+    """
+    forbidden = set(IMPORT_BUDGETS[module][1])
+    assert _imported_modules(module) & forbidden == set()
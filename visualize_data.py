@@ -13,40 +13,70 @@ Copyright Information
 
 This file is Copyright (c) 2020 Caules Ge, Jenci Wei, Zheng Luan
 """
-from main import *
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 
+from game import *
+from main import DATASET
+from aggregate_data import aggregate
+from models import LOG_MODEL, RECIPROCAL_MODEL
+from plot_data import MAX_POINTS, make_trace, band_traces, output_figure
+from simulation import SimulationResult
 
-def visualize_temp_data(temp_data: List[Temperature]) -> None:
+
+def __getattr__(name: str) -> Any:
+    """Return the processed data with the given module attribute name of 'main.py',
+    e.g. CANADA_MEDIAN, which is only loaded when first accessed.
+    """
+    import main
+    if name in main.__all__:
+        return getattr(main, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def visualize_temp_data(temp_data: Union[TemperatureTable, List[Temperature]],
+                        band: Optional[Tuple[float, float]] = None,
+                        max_points: int = MAX_POINTS, output: Optional[str] = None) -> None:
     """Visualize the results of temperature of a province.
     Use a plotly *scatterplot* to visualize the data.
+
+    Large data are downsampled to max_points points, keeping the lowest and highest
+    temperatures of each part of the data. If band is a pair of percentiles, e.g.
+    (10, 90), the band between them and the median of each year are drawn as well.
+    If output is not None, the graph is written to that file instead of shown.
     """
-    x_coords, y_coords = [], []
-    for element in temp_data:
-        x_coords.append(element.year)
-        y_coords.append(element.temp)
+    if not isinstance(temp_data, TemperatureTable):
+        temp_data = TemperatureTable.from_records(temp_data)
+
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=x_coords, y=y_coords, mode='markers'))
-    fig.update_layout(title=temp_data[0].prov, xaxis_title='Year', yaxis_title='Temperature')
-    fig.show()
+    fig.add_trace(make_trace(temp_data.year, temp_data.temp, mode='markers',
+                             name='Temperature', downsample='minmax', max_points=max_points))
 
+    if band is not None:
+        low, high = f'p{band[0]}', f'p{band[1]}'
+        stats = aggregate(temp_data, ['year'], [low, high, 'median'])
+        fig.add_traces(band_traces(stats['year'], stats[low], stats[high],
+                                   f'{band[0]}th to {band[1]}th percentile'))
+        fig.add_trace(go.Scatter(x=stats['year'], y=stats['median'], name='Median'))
 
-def visualize_temp_trend(data: Dict[int, float]) -> None:
+    fig.update_layout(title=str(temp_data.prov[0]), xaxis_title='Year',
+                      yaxis_title='Temperature')
+    output_figure(fig, output)
+
+
+def visualize_temp_trend(data: Dict[int, float], output: Optional[str] = None) -> None:
     """Visualize the trend of temperature data
     Use a plotly *scatterplot* to visualize the data.
     """
-    coords = []
-    for element in data:
-        coords.append((element, data[element]))
-    coords.sort()
-    x_coords = [coord[0] for coord in coords]
-    y_coords = [coord[1] for coord in coords]
+    x_coords = numpy.array(sorted(data))
+    y_coords = numpy.array([data[year] for year in x_coords.tolist()])
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=x_coords, y=y_coords))
+    fig.add_trace(make_trace(x_coords, y_coords))
     fig.update_layout(title='Temperature Data', xaxis_title='Year', yaxis_title='Temperature')
-    fig.show()
+    output_figure(fig, output)
 
 
-def visualize_emission_data(data: Dict[int, int]) -> None:
+def visualize_emission_data(data: Dict[int, int], output: Optional[str] = None) -> None:
     """Visualize the emission data
     Use a plotly *scatterplot* to visualize the data.
     """
@@ -59,13 +89,13 @@ def visualize_emission_data(data: Dict[int, int]) -> None:
 
     domain = numpy.arange(1990, 2020)
     a, b, c = model_emission(data)
-    fig.add_trace(go.Scatter(x=domain, y=a * numpy.log(domain - b) + c))
+    fig.add_trace(go.Scatter(x=domain, y=LOG_MODEL.evaluate(domain, (a, b, c))))
 
     fig.update_layout(title='Emission Data', xaxis_title='Year', yaxis_title='Emission (Megatonnes of CO2 Equivalent)')
-    fig.show()
+    output_figure(fig, output)
 
 
-def visualize_deforestation_data(data: Dict[int, int]) -> None:
+def visualize_deforestation_data(data: Dict[int, int], output: Optional[str] = None) -> None:
     """Visualize the deforestation data
     Use a plotly *scatterplot* to visualize the data.
     """
@@ -78,10 +108,35 @@ def visualize_deforestation_data(data: Dict[int, int]) -> None:
 
     domain = numpy.arange(1990, 2020)
     a, b, c = model_deforestation(data)
-    fig.add_trace(go.Scatter(x=domain, y=a / (domain - b) + c))
+    fig.add_trace(go.Scatter(x=domain, y=RECIPROCAL_MODEL.evaluate(domain, (a, b, c))))
 
     fig.update_layout(title='Deforestation Data', xaxis_title='Year', yaxis_title='Deforstation (Hectares)')
-    fig.show()
+    output_figure(fig, output)
+
+
+def visualize_simulation(result: SimulationResult, percentiles: Tuple[float, float] = (5, 95),
+                         output: Optional[str] = None) -> None:
+    """Visualize the projections of a batch of simulated games, drawing the median
+    and the band between the given percentiles of each year.
+    """
+    bands = result.bands((percentiles[0], 50, percentiles[1]))
+    titles = {'emission': 'Emission (Megatonnes of CO2 Equivalent)',
+              'deforestation': 'Deforestation (Hectares)',
+              'temperature': 'Temperature (Degrees Celsius)'}
+    fig = make_subplots(rows=3, cols=1, subplot_titles=('Emission Data', 'Deforestation Data',
+                                                        'Temperature Data'))
+
+    for row, name in enumerate(titles, start=1):
+        low, median, high = bands[name]
+        for trace in band_traces(result.years, low, high,
+                                 f'{percentiles[0]}th to {percentiles[1]}th percentile'):
+            fig.add_trace(trace, row=row, col=1)
+        fig.add_trace(make_trace(result.years, median, name=f'Median {name}'), row=row, col=1)
+        fig.update_xaxes(title_text='Year', row=row, col=1)
+        fig.update_yaxes(title_text=titles[name], row=row, col=1)
+
+    fig.update_layout(title=f'Projections of {len(result.temperature)} Simulated Games')
+    output_figure(fig, output)
 
 
 if __name__ == '__main__':